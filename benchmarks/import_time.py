@@ -0,0 +1,71 @@
+"""
+Benchmark del tiempo de arranque: importa el camino principal de PVProduction en un intérprete nuevo con
+python -X importtime y muestra el tiempo total y los módulos más costosos.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module pv_sizing.dimension.battery --repeat 10 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+SRC = Path(__file__).resolve().parents[1] / 'src'
+
+# Dependencias pesadas que sólo deben importarse al usarlas (gráficas, pvlib, scraping y dashboard).
+HEAVY_MODULES = ('matplotlib', 'pvlib', 'selenium', 'webdriver_manager', 'dash', 'plotly')
+
+
+def import_time(module):
+    """
+    Función para medir la importación de un módulo en un intérprete nuevo.
+
+    Args:
+        module (str): Módulo a importar.
+
+    Returns:
+        dict: Tiempo acumulado [us] de cada módulo importado (columna cumulative de -X importtime).
+        set: Módulos cargados al terminar la importación.
+    """
+    code = f'import sys, {module}; print(" ".join(sys.modules))'
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(SRC), os.environ.get('PYTHONPATH')]))}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            env=env, check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times, set(result.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='pv_sizing.dimension.pv', help='Módulo a importar.')
+    parser.add_argument('--repeat', type=int, default=5, help='Número de intérpretes nuevos.')
+    parser.add_argument('--top', type=int, default=10, help='Número de módulos más costosos a mostrar.')
+    args = parser.parse_args()
+
+    runs = [import_time(args.module) for _ in range(args.repeat)]
+    totals = [times[args.module] / 1000 for times, _ in runs]
+    print(f'{args.module}: {statistics.median(totals):.1f} ms (mediana de {args.repeat}, '
+          f'mín {min(totals):.1f} ms, máx {max(totals):.1f} ms)')
+
+    # Los módulos más costosos de la ejecución mediana, sin contar los submódulos de cada paquete.
+    times, modules = sorted(runs, key=lambda run: run[0][args.module])[len(runs) // 2]
+    top = sorted(((t, name) for name, t in times.items() if '.' not in name or name == args.module), reverse=True)
+    for t, name in top[:args.top]:
+        print(f'{t / 1000:10.1f} ms  {name}')
+
+    loaded = sorted(name for name in HEAVY_MODULES if name in modules)
+    print('Dependencias pesadas importadas:', ', '.join(loaded) if loaded else 'ninguna')
+    return 1 if loaded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,10 +17,15 @@ setup(
           'numpy-financial',
           'pandas',
           'pvlib',
+          'requests',
           'selenium',
           'plotly',
           'dash'
       ],
+    extras_require={
+          'fast': ['numba'],
+          'parquet': ['pyarrow']
+      },
     include_package_data=True,
     package_data={'pv_sizing/utils': ['example_data/*.csv']},
       )
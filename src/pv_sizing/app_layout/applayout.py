@@ -1,5 +1,4 @@
-from dash import Dash, dcc, html, Input, Output
-import numpy as np
+from dash import Dash, dcc, html
 
 external_stylesheets = ['https://codepen.io/chriddyp/pen/bWLwgP.css']
 app = Dash(__name__, external_stylesheets=external_stylesheets)
@@ -100,7 +99,20 @@ app.layout = html.Div([
             # Allow multiple files to be uploaded
             multiple=True,
         ),
-    dcc.Graph(id='PV', figure={})
+    dcc.Graph(id='PV', figure={}),
+    # Parámetros de la producción ya calculada (ver dashboard.update_production). Los datos se quedan en el servidor.
+    dcc.Store(id='production')
+    ]),
+    html.Div([
+    html.H4("Monte Carlo analysis"),
+    html.Button('Run', id='run-montecarlo', n_clicks=0, style={'marginRight':'10px'}),
+    html.Button('Cancel', id='cancel-montecarlo', n_clicks=0, style={'marginRight':'10px'}),
+    html.Progress(id='job-progress', value=0, max=1, style={'width':'30%', 'marginRight':'10px'}),
+    html.Span(id='job-status'),
+    html.Div(id='montecarlo-result'),
+    # Trabajo en segundo plano en curso (ver dashboard.control_job) y consulta periódica de su progreso.
+    dcc.Store(id='job'),
+    dcc.Interval(id='job-poll', interval=500, disabled=True)
     ]),
     html.Br(), 
     sidebar
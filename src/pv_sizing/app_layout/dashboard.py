@@ -1,63 +1,182 @@
 from pv_sizing.dimension.pv import PVProduction
-import datetime
+import hashlib
+import threading
 import pandas as pd
 
 from pv_sizing.utils.pv_utils import init_inv
+from pv_sizing.utils.cache import Cache
+from pv_sizing.utils.downsample import downsample
+from pv_sizing.dimension.montecarlo import monte_carlo_blocks, simulate_block, summarize
 
 from pv_sizing.app_layout.applayout import app
 import plotly.graph_objects as go
-from dash import Dash, dcc, html, Input, Output, State
+from dash import html, Input, Output, State, callback_context
+from dash.exceptions import PreventUpdate
 from plotly.subplots import make_subplots
 
-import numpy as np
-
 from applayout import app
 from parsedata import parse_data
+from jobs import JobManager
+
+
+# Cachés del servidor, compartidas por todos los usuarios: ficheros subidos ya leídos (por hash del contenido) e
+# instalaciones con el balance energético ya calculado. Sólo en memoria, los datos de los usuarios no se guardan en disco.
+upload_cache = Cache('dashboard_uploads', maxsize=32, max_bytes=0)
+production_cache = Cache('dashboard_production', maxsize=32, max_bytes=0)
+_cache_lock = threading.Lock()
+
+# Trabajos en segundo plano (análisis largos como Monte Carlo), para no bloquear los callbacks interactivos.
+jobs = JobManager()
+
+MONTE_CARLO_SAMPLES = 100000
+
+# Número máximo de puntos de cada serie temporal enviada al navegador (del orden del ancho de la gráfica en píxeles).
+PLOT_POINTS = 2000
+
+
+def parsed_upload(content, filename):
+    """
+    Función para leer un fichero subido, o recuperarlo de upload_cache si ya se ha leído.
+
+    Args:
+        content (str): Contenido del fichero codificado en base64 (dcc.Upload).
+        filename (str): Nombre del fichero.
+
+    Returns:
+        str: Hash SHA-1 del contenido, la clave del fichero en upload_cache.
+    """
+    key = hashlib.sha1(content.encode()).hexdigest()
+    with _cache_lock:
+        if upload_cache.get(key) is not None:
+            return key
+
+    df = parse_data(content, filename)
+    if not isinstance(df, pd.DataFrame):
+        # El fichero no se ha podido leer (ver parse_data).
+        raise PreventUpdate
+    df = df.set_index(df.columns[0], drop=True)
+    with _cache_lock:
+        upload_cache.set(key, df)
+    return key
+
+
+def visible_range(relayout):
+    """
+    Función para obtener el rango visible del eje x de la gráfica de energía a partir de su relayoutData.
+
+    Args:
+        relayout (dict): relayoutData de la gráfica PV.
+
+    Returns:
+        tuple: Inicio y fin del rango visible, o None si se muestra toda la serie.
+    """
+    relayout = relayout or {}
+    if 'xaxis.range[0]' in relayout:
+        return relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    if 'xaxis.range' in relayout:
+        return tuple(relayout['xaxis.range'])
+    return None
+
+
+def production(spec):
+    """
+    Función para obtener la instalación de unos parámetros, o recuperarla de production_cache si ya se ha calculado.
+
+    Args:
+        spec (dict): Claves de los ficheros subidos (uploads) y tnoct, gamma, panel_power y num_panel.
+
+    Returns:
+        PVProduction: Instalación con la carga y la producción anual media y el balance energético ya calculados.
+    """
+    key = Cache.key(spec['uploads'], spec['tnoct'], spec['gamma'], spec['panel_power'], spec['num_panel'])
+    with _cache_lock:
+        pv = production_cache.get(key)
+        dfs = [upload_cache.get(upload) for upload in spec['uploads']]
+    if pv is not None:
+        return pv
+    if any(df is None for df in dfs):
+        # Los ficheros han salido de la caché: hay que volver a subirlos.
+        raise PreventUpdate
+
+    for df in dfs:
+        if 'Gb(i)' in df.columns:
+            irr_data = df
+        else:
+            load_data = df
+
+    pv = PVProduction(irr_data=irr_data, load=load_data, tnoct=spec['tnoct'], gamma=spec['gamma'],
+                      panel_power=spec['panel_power'], num_panel=spec['num_panel'])
+    # Se calcula todo lo que usa el análisis económico antes de compartir la instalación entre peticiones.
+    pv.energy_balance()
+    with _cache_lock:
+        production_cache.set(key, pv)
+    return pv
 
 
 @app.callback(
-[Output(component_id='PV', component_property='figure')],
+Output(component_id='production', component_property='data'),
 [Input('upload-data', 'contents'),
 Input('upload-data', 'filename'),
 Input(component_id='num_panels', component_property='value'),
+Input(component_id='select_tnoct', component_property='value'),
+Input(component_id='panel_power', component_property='value'),
+Input(component_id='gamma', component_property='value'),
+])
+def update_production(contents, filename, num_panel, tnoct, panel_power, gamma):
+    """
+    Callback de los parámetros que cambian la producción. Calcula la instalación y guarda sus parámetros en el
+    dcc.Store production; los ficheros sólo se decodifican la primera vez que se suben.
+    """
+    if not contents:
+        return None
+
+    spec = {'uploads': [parsed_upload(c, f) for c, f in zip(contents, filename)], 'tnoct': tnoct, 'gamma': gamma,
+            'panel_power': panel_power, 'num_panel': num_panel}
+    production(spec)
+    return spec
+
+
+@app.callback(
+[Output(component_id='PV', component_property='figure')],
+[Input(component_id='production', component_property='data'),
 Input(component_id='panel_price', component_property='value'),
 Input(component_id='inverter_price', component_property='value'),
 Input(component_id='addition_cost', component_property='value'),
 Input(component_id='instalation_cost_perc', component_property='value'),
-Input(component_id='select_tnoct', component_property='value'),
-Input(component_id='panel_power', component_property='value'),
-Input(component_id='gamma', component_property='value'),
+Input(component_id='PV', component_property='relayoutData'),
 ])
-def interactive_plot(contents, filename, num_panel, panel_price, inverter_price, additional_cost, installation_cost_perc,
-                     tnoct, panel_power, gamma):
+def interactive_plot(spec, panel_price, inverter_price, additional_cost, installation_cost_perc, relayout):
+    """
+    Callback de los costes y del zoom. Sólo repite el análisis económico sobre la instalación de production_cache, y
+    las series de energía se reducen a PLOT_POINTS puntos del rango visible (ver utils.downsample), que se refinan
+    al hacer zoom.
+    """
+    triggered = [t['prop_id'] for t in callback_context.triggered]
+    if triggered == ['PV.relayoutData'] and not (relayout and any(k.startswith('xaxis.') for k in relayout)):
+        # Cambios de la gráfica que no afectan al eje x de las series de energía (leyenda, zoom del cashflow).
+        raise PreventUpdate
+    x_range = visible_range(relayout)
+
     fig = make_subplots(rows=2, cols=1, horizontal_spacing = 1)
-    if contents:
-        dfs = []
-        for c, f in zip(contents, filename):
-            df = parse_data(c, f)
-            df = df.set_index(df.columns[0], drop=True)
-            dfs.append(df)
-
-        for df in dfs:
-            if 'Gb(i)' in df.columns:
-                irr_data = df
-            else:
-                load_data = df
-
-        pv = PVProduction(irr_data=irr_data, load=load_data, tnoct=tnoct, gamma=gamma, panel_power=panel_power, num_panel=num_panel)
-
-        initial_investment = init_inv(num_panel=num_panel, price_panel=panel_price,
+    if spec:
+        pv = production(spec)
+
+        initial_investment = init_inv(num_panel=spec['num_panel'], price_panel=panel_price,
                                         additional_cost=additional_cost, installation_cost_perc=installation_cost_perc,
                                         price_inverter=inverter_price)
 
         cashflow, van, tir = pv.economic_analysis(initial_investment)
 
+        load = downsample(pv.myload_yearly.AE_kWh, PLOT_POINTS, x_range)
+        prod = downsample(pv.myprod_yearly.kWh, PLOT_POINTS, x_range)
+
+        # Scattergl dibuja las series con WebGL, mucho más rápido que SVG en equipos lentos.
         fig.add_trace(
-            go.Scatter(x = pv.myload_yearly.index, y = pv.myload_yearly.AE_kWh, name = 'Load'),
+            go.Scattergl(x = load.index, y = load.values, name = 'Load'),
             row=1, col=1
         )
 
-        fig.add_trace(go.Scatter(x = pv.myload_yearly.index, y = pv.myprod_yearly.kWh, name= 'PV production'),
+        fig.add_trace(go.Scattergl(x = prod.index, y = prod.values, name= 'PV production'),
             row=1, col=1
         )
 
@@ -80,10 +199,97 @@ def interactive_plot(contents, filename, num_panel, panel_price, inverter_price,
         x=1))
 
         fig.update_layout(
-        paper_bgcolor="#f8f9fa"
+        paper_bgcolor="#f8f9fa",
+        # Mantiene el zoom del usuario al redibujar la figura con los puntos del nuevo rango.
+        uirevision=str(spec)
         )
+        if x_range is not None:
+            fig.update_xaxes(range=list(x_range), row=1, col=1)
 
     return [fig]
 
+
+def monte_carlo_job(job, spec, initial_investment, n_samples):
+    """
+    Trabajo en segundo plano con el análisis de Monte Carlo de la instalación (ver dimension.montecarlo).
+
+    Returns:
+        pd.DataFrame: P90, P50 y P10 del VAN, la TIR y el periodo de retorno.
+    """
+    job.progress(0, 'tabulating savings')
+    pv = production(spec)
+    blocks = monte_carlo_blocks(pv, initial_investment, n_samples=n_samples, seed=0, chunk_size=10000)
+    job.progress(0.1, 'simulating')
+    chunks = job.map(simulate_block, blocks, start=0.1)
+    return summarize(pd.concat(chunks, ignore_index=True))
+
+
+def summary_table(summary):
+    """
+    Función para mostrar el resumen de Monte Carlo como tabla HTML.
+    """
+    formats = {'npv': '{:,.0f} €', 'irr': '{:.1%}', 'payback': '{:.1f} years'}
+    header = html.Tr([html.Th('')] + [html.Th(column.upper()) for column in summary.columns])
+    rows = [html.Tr([html.Td(name)] + [html.Td(formats[column].format(value)) for column, value in row.items()])
+            for name, row in summary.iterrows()]
+    return html.Table([header] + rows)
+
+
+@app.callback(
+Output(component_id='job', component_property='data'),
+[Input(component_id='run-montecarlo', component_property='n_clicks'),
+Input(component_id='cancel-montecarlo', component_property='n_clicks'),
+],
+[State(component_id='production', component_property='data'),
+State(component_id='panel_price', component_property='value'),
+State(component_id='inverter_price', component_property='value'),
+State(component_id='addition_cost', component_property='value'),
+State(component_id='instalation_cost_perc', component_property='value'),
+State(component_id='job', component_property='data'),
+])
+def control_job(run, cancel, spec, panel_price, inverter_price, additional_cost, installation_cost_perc, key):
+    """
+    Callback de los botones de Monte Carlo. Encola el análisis o lo cancela y devuelve el identificador del trabajo;
+    el cálculo nunca se hace en el callback.
+    """
+    triggered = [t['prop_id'] for t in callback_context.triggered]
+    if 'cancel-montecarlo.n_clicks' in triggered:
+        if key:
+            jobs.cancel(key)
+        return key
+    if not run or not spec:
+        raise PreventUpdate
+
+    initial_investment = init_inv(num_panel=spec['num_panel'], price_panel=panel_price,
+                                  additional_cost=additional_cost, installation_cost_perc=installation_cost_perc,
+                                  price_inverter=inverter_price)
+    return jobs.submit(monte_carlo_job, spec, initial_investment, MONTE_CARLO_SAMPLES,
+                       key=Cache.key('monte_carlo', spec, initial_investment, MONTE_CARLO_SAMPLES))
+
+
+@app.callback(
+[Output(component_id='job-poll', component_property='disabled'),
+Output(component_id='job-progress', component_property='value'),
+Output(component_id='job-status', component_property='children'),
+Output(component_id='montecarlo-result', component_property='children'),
+],
+[Input(component_id='job', component_property='data'),
+Input(component_id='job-poll', component_property='n_intervals'),
+])
+def poll_job(key, n_intervals):
+    """
+    Callback periódico (dcc.Interval) con el progreso del trabajo. El intervalo se desactiva al terminar.
+    """
+    status = jobs.status(key) if key else None
+    if status is None:
+        return True, 0, '', None
+
+    text = f"{status['state'].capitalize()}" + (f": {status['message']}" if status['state'] == 'running' else '')
+    if status['error']:
+        text += f": {status['error']}"
+    result = jobs.result(key)
+    return (status['state'] not in ('queued', 'running'), status['progress'], text,
+            summary_table(result) if result is not None else None)
+
 if __name__ == "__main__":
     app.run_server(debug=True)
\ No newline at end of file
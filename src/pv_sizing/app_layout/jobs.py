@@ -0,0 +1,271 @@
+import multiprocessing
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from pv_sizing.utils.cache import Cache
+
+
+STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+
+# Resultados de los trabajos terminados, por clave de sus argumentos. Sólo en memoria.
+job_cache = Cache('dashboard_jobs', maxsize=32, max_bytes=0)
+
+
+class JobCancelled(Exception):
+    """
+    Se lanza dentro de un trabajo cuando se ha pedido su cancelación.
+    """
+
+
+class Job:
+
+    def __init__(self, key, pool):
+        """
+        Trabajo en segundo plano. La función del trabajo lo recibe como primer argumento para informar del progreso,
+        repartir bloques entre los procesos del pool (ver map) y comprobar si se ha cancelado.
+
+        Args:
+            key (str): Clave del trabajo (ver JobManager.submit).
+            pool (callable): Función sin argumentos que devuelve el ProcessPoolExecutor compartido.
+        """
+        self.key = key
+        self.state = 'queued'
+        self.progress_value = 0.0
+        self.message = ''
+        self.error = None
+        self.result = None
+        self.submitted = time.time()
+        self.finished = None
+        self._pool = pool
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        """
+        Función para terminar el trabajo (JobCancelled) si se ha pedido su cancelación.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+
+    def progress(self, value, message=None):
+        """
+        Función para informar del progreso del trabajo. También comprueba si se ha cancelado.
+
+        Args:
+            value (float): Fracción completada, de 0 a 1.
+            message (str): Descripción del paso en curso.
+        """
+        self.check()
+        self.progress_value = min(max(float(value), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def map(self, func, blocks, start=0.0, end=1.0):
+        """
+        Función para ejecutar bloques en los procesos del pool, informando del progreso a medida que terminan.
+
+        Al cancelar el trabajo los bloques que aún no han empezado se descartan; los que están en marcha terminan en
+        su proceso pero su resultado se ignora.
+
+        Args:
+            func (callable): Función de cada bloque. Debe poder importarse desde los procesos del pool.
+            blocks (list): Argumentos de cada bloque (tuplas).
+            start, end (float): Progreso del trabajo al empezar y al terminar los bloques.
+
+        Returns:
+            list: Resultado de cada bloque, en el mismo orden que blocks.
+        """
+        self.check()
+        futures = [self._pool().submit(func, *block) for block in blocks]
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                self.progress(start + (end - start) * (len(futures) - len(pending)) / len(futures))
+            return [future.result() for future in futures]
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def status(self):
+        """
+        Returns:
+            dict: Estado (ver STATES), progreso, mensaje y error del trabajo.
+        """
+        return {'key': self.key, 'state': self.state, 'progress': self.progress_value, 'message': self.message,
+                'error': self.error}
+
+
+class JobManager:
+
+    def __init__(self, max_jobs=2, processes=None, cache=job_cache, mp_context='spawn', max_finished=32):
+        """
+        Cola de trabajos en segundo plano del dashboard, sin servicios externos.
+
+        Como mucho max_jobs trabajos se ejecutan a la vez, cada uno en un hilo, y el resto espera en la cola. El
+        cálculo pesado de los trabajos se reparte en un pool de procesos compartido (ver Job.map), de modo que no
+        compite por el GIL con los callbacks interactivos. Los resultados se guardan en cache con la clave de los
+        argumentos del trabajo: repetir un análisis ya hecho no vuelve a calcularlo. Los trabajos terminados se
+        olvidan cuando su resultado sale de la caché (o, los fallidos y cancelados, pasados max_finished), de modo
+        que la memoria está acotada por la de la caché.
+
+        El pool usa por defecto el método de arranque 'spawn': hacer fork dentro del servidor de Dash, que tiene
+        varios hilos, puede copiar locks tomados por otros hilos y bloquear los procesos hijos.
+
+        Args:
+            max_jobs (int): Número de trabajos simultáneos.
+            processes (int): Número de procesos del pool. Por defecto el número de CPUs.
+            cache (Cache): Caché de resultados. None para no guardarlos.
+            mp_context (str): Método de arranque de los procesos del pool ('spawn', 'forkserver' o 'fork').
+            max_finished (int): Número máximo de trabajos fallidos o cancelados que se recuerdan.
+        """
+        self.cache = cache
+        self.processes = processes
+        self.mp_context = multiprocessing.get_context(mp_context)
+        self.max_finished = max_finished
+        self._threads = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='pv_sizing_job')
+        self._pool = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def pool(self):
+        """
+        Returns:
+            ProcessPoolExecutor: Pool de procesos compartido por todos los trabajos, creado al usarse por primera vez.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=self.mp_context)
+            return self._pool
+
+    def submit(self, func, *args, key=None, **kwargs):
+        """
+        Función para encolar un trabajo.
+
+        Si ya hay un trabajo con la misma clave en la cola o en marcha se reutiliza, y si su resultado está en la
+        caché el trabajo se da por terminado sin ejecutarlo.
+
+        Args:
+            func (callable): Función del trabajo, func(job, *args, **kwargs).
+            *args, **kwargs: Argumentos de func.
+            key (str): Clave del trabajo y de su resultado. Por defecto Cache.key de la función y los argumentos.
+
+        Returns:
+            str: Identificador del trabajo (su clave).
+        """
+        if key is None:
+            key = Cache.key(func.__module__, func.__qualname__, args, sorted(kwargs.items()))
+
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(key)
+            if job is not None and job.state in ('queued', 'running', 'done'):
+                return key
+
+            job = Job(key, self.pool)
+            self._jobs[key] = job
+            if self.cache is not None and self.cache.get(key) is not None:
+                job.state, job.progress_value = 'done', 1.0
+                return key
+
+        self._threads.submit(self._run, job, func, args, kwargs)
+        return key
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancelled:
+            job.state = 'cancelled'
+            return
+        job.state = 'running'
+        try:
+            result = func(job, *args, **kwargs)
+        except JobCancelled:
+            job.state = 'cancelled'
+        except Exception as e:
+            job.error = f'{type(e).__name__}: {e}'
+            job.state = 'failed'
+            traceback.print_exc()
+        else:
+            # Con caché el resultado sólo se guarda en ella, y se olvida con el trabajo (ver _prune).
+            if self.cache is not None:
+                self.cache.set(job.key, result)
+            else:
+                job.result = result
+            job.progress_value, job.state = 1.0, 'done'
+        finally:
+            job.finished = time.time()
+
+    def _prune(self):
+        """
+        Olvida los trabajos terminados cuyo resultado ya no está en la caché y los fallidos y cancelados más antiguos.
+        """
+        if self.cache is not None:
+            for key in [key for key, job in self._jobs.items() if job.state == 'done' and key not in self.cache]:
+                del self._jobs[key]
+        failed = sorted((job for job in self._jobs.values() if job.state in ('failed', 'cancelled')),
+                        key=lambda job: job.finished or job.submitted)
+        for job in failed[:max(len(failed) - self.max_finished, 0)]:
+            del self._jobs[job.key]
+
+    def status(self, key):
+        """
+        Función para consultar el estado de un trabajo.
+
+        Args:
+            key (str): Identificador del trabajo.
+
+        Returns:
+            dict: Estado del trabajo (ver Job.status), o None si no existe.
+        """
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(key)
+        return job.status() if job is not None else None
+
+    def result(self, key):
+        """
+        Función para obtener el resultado de un trabajo terminado.
+
+        Args:
+            key (str): Identificador del trabajo.
+
+        Returns:
+            Resultado de la función del trabajo, o None si no ha terminado.
+        """
+        job = self._jobs.get(key)
+        if job is None or job.state != 'done':
+            return None
+        return self.cache.get(key) if self.cache is not None else job.result
+
+    def cancel(self, key):
+        """
+        Función para cancelar un trabajo en la cola o en marcha. Un trabajo en marcha se detiene la próxima vez que
+        informa del progreso.
+
+        Args:
+            key (str): Identificador del trabajo.
+
+        Returns:
+            bool: True si el trabajo no había terminado.
+        """
+        job = self._jobs.get(key)
+        if job is None or job.state not in ('queued', 'running'):
+            return False
+        job._cancel.set()
+        if job.state == 'queued':
+            job.state = 'cancelled'
+        return True
+
+    def shutdown(self, wait=True):
+        """
+        Función para cancelar los trabajos pendientes y cerrar los hilos y el pool de procesos.
+        """
+        for key in list(self._jobs):
+            self.cancel(key)
+        self._threads.shutdown(wait=wait)
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
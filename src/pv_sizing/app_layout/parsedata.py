@@ -1,25 +1,90 @@
 import pandas as pd
-from dash import Dash, dcc, html, Input, Output, State
-import base64
+import binascii
 import io
+import re
 
 
-def parse_data(contents, filename):
-    content_type, content_string = contents.split(",")
+# Tamaño máximo de un fichero subido, ya decodificado [bytes].
+MAX_UPLOAD_BYTES = 64 * 2 ** 20
 
-    decoded = base64.b64decode(content_string)
+EXCEL_EXTENSIONS = ('.xls', '.xlsx', '.xlsm', '.ods')
+
+# Separadores que se buscan en la cabecera de los ficheros de texto, por orden. Si no aparece ninguno las columnas
+# se separan por espacios.
+SEPARATORS = (',', ';', '\t')
+
+
+def decode_upload(contents, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Función para decodificar el contenido de dcc.Upload ("data:<tipo>;base64,<datos>").
+
+    Args:
+        contents (str): Contenido del fichero subido.
+        max_bytes (int): Tamaño máximo del fichero decodificado [bytes].
+
+    Returns:
+        bytes: Contenido del fichero.
+    """
+    start = contents.index(',') + 1
+    # Cada 4 caracteres en base64 son 3 bytes: el tamaño se comprueba antes de decodificar.
+    size = (len(contents) - start) * 3 // 4
+    if size > max_bytes:
+        raise ValueError(f'Uploaded file is {size / 2 ** 20:.1f} MiB, the limit is {max_bytes / 2 ** 20:.1f} MiB.')
+    # Se decodifica una vista de los datos, sin copiar la cadena base64 al separarla de la cabecera.
+    return binascii.a2b_base64(memoryview(contents.encode('ascii'))[start:])
+
+
+def sniff_format(buffer):
+    """
+    Función para detectar el formato de un fichero de texto a partir de su cabecera y su primera fila.
+
+    Args:
+        buffer (bytes): Contenido del fichero.
+
+    Returns:
+        dict: Argumentos sep, decimal y names para pd.read_csv.
+    """
+    lines = bytes(buffer[:2 ** 16]).decode('utf-8', errors='replace').splitlines()[:2]
+    header = lines[0] if lines else ''
+    sep = next((sep for sep in SEPARATORS if sep in header), r'\s+')
+    names = [name.strip().strip('"') for name in (header.split(sep) if sep != r'\s+' else header.split())]
+
+    # Con un separador distinto de la coma los números pueden usar la coma decimal (p. ej. 0,206).
+    row = lines[1] if len(lines) > 1 else ''
+    decimal = ',' if sep != ',' and re.search(r'\d,\d', row) else '.'
+    return {'sep': sep, 'decimal': decimal, 'names': names}
+
+
+def parse_data(contents, filename, max_bytes=MAX_UPLOAD_BYTES, dtype='float64'):
+    """
+    Función para leer un fichero subido al dashboard: Excel o texto separado por comas, punto y coma, tabuladores
+    o espacios.
+
+    El contenido se decodifica una sola vez y pandas lo lee directamente del buffer de bytes, sin pasarlo a str.
+    El formato se detecta con la cabecera y las columnas, salvo la primera (el tiempo), se leen directamente como
+    dtype.
+
+    Args:
+        contents (str): Contenido del fichero subido (dcc.Upload).
+        filename (str): Nombre del fichero.
+        max_bytes (int): Tamaño máximo del fichero decodificado [bytes].
+        dtype (np.dtype): Tipo de dato de las columnas numéricas, p. ej. float32 para reducir memoria.
+
+    Returns:
+        pd.DataFrame: Datos del fichero, o un mensaje de error (html.Div) si no se ha podido leer.
+    """
     try:
-        if "csv" in filename:
-            # Assume that the user uploaded a CSV or TXT file
-            df = pd.read_csv(io.StringIO(decoded.decode("utf-8")))
-        elif "xls" in filename:
-            # Assume that the user uploaded an excel file
+        decoded = decode_upload(contents, max_bytes)
+        if filename.lower().endswith(EXCEL_EXTENSIONS):
             df = pd.read_excel(io.BytesIO(decoded))
-        elif "txt" or "tsv" in filename:
-            # Assume that the user upl, delimiter = r'\s+'oaded an excel file
-            df = pd.read_csv(io.StringIO(decoded.decode("utf-8")), delimiter=r"\s+")
+        else:
+            fmt = sniff_format(memoryview(decoded))
+            df = pd.read_csv(io.BytesIO(decoded), header=0, encoding='utf-8',
+                             dtype={name: dtype for name in fmt['names'][1:]}, **fmt)
     except Exception as e:
         print(e)
+        from dash import html
+
         return html.Div(["There was an error processing this file."])
 
     return df
@@ -1,5 +1,126 @@
-from math import ceil
+import numpy as np
+import pandas as pd
+
 from pv_sizing.dimension.pv import PVProduction
+from pv_sizing.utils.dispatch import simulate_battery, simulate_battery_batch
+from pv_sizing.utils.tariff import price_profile
+from pv_sizing.utils.timeseries import HOUR, infer_step, steps_per_hour
+
+
+def daily_energy(load, step=None):
+    """
+    Función para calcular la energía diaria media de una o varias cargas.
+
+    Args:
+        load (pd.DataFrame): Energía consumida por intervalo [kWh], una columna por carga (por ejemplo por contador).
+        step (pd.Timedelta or str): Time step de la carga. Por defecto se obtiene del índice.
+
+    Returns:
+        pd.Series: Energía diaria media [kWh] de cada columna.
+    """
+    if not isinstance(load.index, pd.DatetimeIndex):
+        load = load.set_axis(pd.to_datetime(load.index))
+    step = infer_step(load.index) if step is None else step
+    return load.groupby(load.index.hour).mean().sum(min_count=1) * steps_per_hour(step)
+
+
+def nominal_voltage(daily_energy):
+    """
+    Función para elegir la tensión nominal del banco de baterías según la energía diaria.
+
+    Args:
+        daily_energy (float or array_like): Energía diaria [kWh].
+
+    Returns:
+        np.ndarray: Tensión nominal [V]: 12 V hasta 1 kWh, 24 V hasta 3,5 kWh y 48 V por encima. NaN si no hay carga.
+    """
+    daily_energy = np.asarray(daily_energy, dtype=float)
+    return np.select([np.isnan(daily_energy), daily_energy <= 1, daily_energy <= 3.5], [np.nan, 12, 24], 48)[()]
+
+
+def fleet_battery_sizing(load, inversor_eff, batt_volt, days_auto, dod, amp_hour_rating, amb_temp_multiplier,
+                         step=None):
+    """
+    Función para dimensionar por días de autonomía las baterías de muchas cargas a la vez.
+
+    Sólo se usa la carga, sin calcular la producción fotovoltaica ni crear un BatterySizing por carga.
+    Todos los pasos se calculan para todas las columnas en una sola operación.
+
+    Args:
+        load (pd.DataFrame): Energía consumida por intervalo [kWh], una columna por carga (por ejemplo por contador).
+        inversor_eff (float): Eficiencia del inversor obtenida de la hoja técnica.
+        batt_volt (int): Voltaje [V] de una batería.
+        days_auto (float): Días de autonomía.
+        dod (float): dod de la batería obtenida de la hoja técnica.
+        amp_hour_rating (float): Amp-hour rating obtenido de la hoja técnica.
+        amb_temp_multiplier (float): Multiplicador de temperatura dependiente de la temperatura mínima en invierno.
+        step (pd.Timedelta or str): Time step de la carga. Por defecto se obtiene del índice.
+
+    Returns:
+        pd.DataFrame: Energía diaria [kWh], amperios-hora diarios [Ah], tensión nominal [V], capacidad total de
+        baterías [Ah], número de baterías en paralelo y número de baterías en serie de cada columna.
+    """
+    sizing = pd.DataFrame({'daily_energy': daily_energy(load, step)})
+    sizing['daily_ah'] = (sizing.daily_energy * 1000 / inversor_eff) / batt_volt
+    sizing['nominal_voltage'] = nominal_voltage(sizing.daily_energy.values)
+    sizing['total_battery_capacity'] = (sizing.daily_ah * amb_temp_multiplier * days_auto) / dod
+    sizing['n_bat_paralell'] = np.ceil(sizing.total_battery_capacity / amp_hour_rating).astype('Int64')
+    sizing['n_bat_series'] = np.ceil(sizing.nominal_voltage / batt_volt).astype('Int64')
+    return sizing
+
+
+def battery_sweep(pv, capacities, powers=None, round_trip_eff=0.9, dod=0.9, buy_price=0.32, sell_price=0.06):
+    """
+    Función para evaluar una rejilla de capacidades (y potencias) de batería sobre la misma instalación.
+
+    Todos los candidatos comparten la carga y la producción ya calculadas en pv, sin crear un BatterySizing
+    por candidato, y se simulan a la vez en una sola pasada sobre el tiempo (ver
+    utils.dispatch.simulate_battery_batch). Con balance_mode='per_year' se simulan seguidos todos los años de
+    irradiancia y los resultados son la media anual.
+
+    Args:
+        pv (PVProduction): Instalación con la carga e irradiancia del cliente.
+        capacities (array_like): Capacidades candidatas [kWh]. 0 equivale a no instalar batería.
+        powers (array_like): Potencias máximas de carga y descarga candidatas [kW]. Se evalúan todas las
+            combinaciones con capacities. Por defecto sin límite (np.inf).
+        round_trip_eff (float): Eficiencia de un ciclo completo de carga y descarga.
+        dod (float): Profundidad de descarga máxima.
+        buy_price: Precio de compra de energía (ver utils.tariff.price_profile).
+        sell_price: Precio de venta de energía, en los mismos formatos que buy_price.
+
+    Returns:
+        pd.DataFrame: Capacidad, potencia, ratio de autoconsumo, energía comprada y vertida [kWh/año] y ahorro
+        anual [€] respecto a no tener instalación fotovoltaica de cada candidato.
+    """
+    load = pv.myload_yearly.AE_kWh
+    buy = price_profile(buy_price, load.index)
+    sell = price_profile(sell_price, load.index)
+
+    if pv.balance_mode == 'per_year':
+        prod = pv.myprod_by_year.values
+        net = pv._balance_by_year.ravel()
+    else:
+        prod = pv.myprod_yearly.kWh.values[None, :]
+        net = np.nan_to_num((load - pv.myprod_yearly.kWh).values)
+    n_years = len(prod)
+    buy, sell = np.tile(buy, n_years), np.tile(sell, n_years)
+
+    production = np.nansum(prod) / n_years
+    cost_without_pv = buy[:len(load)] @ np.nan_to_num(load.values)
+
+    powers = np.inf if powers is None else powers
+    capacities, powers = (a.ravel() for a in np.meshgrid(np.atleast_1d(capacities).astype(float),
+                                                        np.atleast_1d(powers).astype(float), indexing='ij'))
+
+    result = simulate_battery_batch(net, capacities, power=powers, round_trip_eff=round_trip_eff, dod=dod,
+                                    step_hours=pv.step / HOUR, buy_price=buy, sell_price=sell)
+    from_grid = result['from_grid'] / n_years
+    into_grid = result['into_grid'] / n_years
+    savings = cost_without_pv - (result['cost'] - result['revenue']) / n_years
+
+    return pd.DataFrame({'capacity': capacities, 'power': powers,
+                         'self_consumption_ratio': (production - into_grid) / production,
+                         'from_grid': from_grid, 'into_grid': into_grid, 'savings': savings})
 
 class BatterySizing(PVProduction):
 
@@ -52,7 +173,7 @@ class BatterySizing(PVProduction):
         self.amb_temp_multiplier = amb_temp_multiplier
 
     def daily_energy(self):
-        return self.mean_hourly_load_data().AE_kWh.sum()
+        return daily_energy(self.load, self.step).iloc[0]
 
     def daily_ah(self):
         """
@@ -63,17 +184,7 @@ class BatterySizing(PVProduction):
         return (self.daily_energy() * 1000 / self.inversor_eff) / self.batt_volt # to Ah wiht x1000
 
     def set_nominal_voltage(self):
-
-        daily_energy = self.daily_energy()
-
-        if daily_energy <= 1:
-            nom_vol = 12
-        elif (daily_energy > 1) and (daily_energy <= 3.5):
-            nom_volt = 24
-        else:
-            nom_volt = 48
-        
-        return nom_volt
+        return int(nominal_voltage(self.daily_energy()))
 
     def battery_sizing(self):
         """
@@ -82,8 +193,44 @@ class BatterySizing(PVProduction):
             Capcaidad total de baterías, número de baterías en paralelo, número de baterías en serie
 
         """
-        daily_ah = self.daily_ah() * self.amb_temp_multiplier
-        total_battery_capacity = (daily_ah * self.days_auto) / self.dod
-        n_bat_paralell = ceil(total_battery_capacity / self.amp_hour_rating)
-        n_bat_series = ceil(self.nominal_voltage / self.batt_volt)
-        return total_battery_capacity, n_bat_paralell, n_bat_series
+        sizing = fleet_battery_sizing(self.load, inversor_eff=self.inversor_eff, batt_volt=self.batt_volt,
+                                      days_auto=self.days_auto, dod=self.dod, amp_hour_rating=self.amp_hour_rating,
+                                      amb_temp_multiplier=self.amb_temp_multiplier, step=self.step).iloc[0]
+        return sizing.total_battery_capacity, int(sizing.n_bat_paralell), int(sizing.n_bat_series)
+
+    def battery_dispatch(self, capacity, power=None, round_trip_eff=0.9, dod=None, soc_init=None, by_year=False):
+        """
+        Función para simular la carga y descarga de la batería en cada time step (ver utils.dispatch.simulate_battery).
+
+        Args:
+            capacity: float
+                Capacidad nominal de la batería [kWh].
+            power: float
+                Potencia máxima de carga y descarga [kW]. Por defecto sin límite.
+            round_trip_eff: float
+                Eficiencia de un ciclo completo de carga y descarga.
+            dod: float
+                Profundidad de descarga máxima. Por defecto la de la instancia.
+            soc_init: float
+                Estado de carga inicial [kWh]. Por defecto el mínimo.
+            by_year: bool
+                Si es False se simula el año tipo. Si es True se simulan seguidos todos los años de irradiancia
+                (ver myprod_by_year) sin reiniciar el estado de carga.
+
+        Returns: pd.DataFrame
+            Estado de carga, energía cargada, descargada, comprada y vertida [kWh] de cada time step.
+        """
+        load = self.myload_yearly.AE_kWh
+        if by_year:
+            prod = self.myprod_by_year
+            net = self._balance_by_year.ravel()
+            index = pd.MultiIndex.from_product([prod.index, load.index], names=['year', load.index.name])
+        else:
+            net = (load - self.myprod_yearly.kWh).values
+            index = load.index
+
+        result = simulate_battery(net, capacity, power=power, round_trip_eff=round_trip_eff,
+                                  dod=self.dod if dod is None else dod, soc_init=soc_init,
+                                  step_hours=self.step / HOUR)
+
+        return pd.DataFrame(result, index=index)
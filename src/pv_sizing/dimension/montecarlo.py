@@ -0,0 +1,186 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pv_sizing.utils.tariff import price_profile
+from pv_sizing.utils.finance import npv, irr, payback_period
+
+
+# Factores de producción restante (1 - degradación) ** año en los que se tabula el ahorro.
+DEGRADATION_GRID = np.linspace(0.5, 1, 51)
+
+
+def sample(spec, rng, size):
+    """
+    Función para muestrear un parámetro incierto.
+
+    Args:
+        spec: Valor fijo (float), tupla (media, desviación típica) de una normal o función (rng, size) -> np.ndarray.
+        rng (np.random.Generator): Generador de números aleatorios.
+        size (int or tuple): Número de muestras.
+
+    Returns:
+        np.ndarray: Muestras del parámetro.
+    """
+    if callable(spec):
+        return np.asarray(spec(rng, size), dtype=float)
+    if isinstance(spec, tuple):
+        return rng.normal(spec[0], spec[1], size)
+    return np.full(size, float(spec))
+
+
+def savings_table(pv, buy_price=0.32):
+    """
+    Función para tabular el ahorro del primer año para cada año de irradiancia y factor de degradación.
+
+    El ahorro es lineal en el precio de venta, por lo que se guarda por separado la parte que depende
+    del precio de compra y la energía vertida.
+
+    Args:
+        pv (PVProduction): Instalación con la carga e irradiancia del cliente.
+        buy_price: Precio de compra en cualquier formato de utils.tariff.price_profile.
+
+    Returns:
+        tuple: Ahorro sin compensación [€] y energía vertida [kWh], ambos como matrices años x DEGRADATION_GRID.
+    """
+    load = np.nan_to_num(pv.myload_yearly.AE_kWh.values)
+    prod = pv.myprod_by_year.values
+    buy = price_profile(buy_price, pv.myload_yearly.index)
+
+    bought = np.empty((len(prod), len(DEGRADATION_GRID)))
+    exported = np.empty_like(bought)
+    for k, factor in enumerate(DEGRADATION_GRID):
+        balance = load - factor * prod
+        bought[:, k] = np.clip(balance, 0, None) @ buy
+        exported[:, k] = -np.clip(balance, None, 0).sum(axis=1)
+
+    return buy @ load - bought, exported
+
+
+def _interpolate(table, year, factor):
+    """
+    Interpola linealmente la tabla (años x DEGRADATION_GRID) en los factores de degradación indicados.
+    """
+    step = DEGRADATION_GRID[1] - DEGRADATION_GRID[0]
+    pos = np.clip((factor - DEGRADATION_GRID[0]) / step, 0, len(DEGRADATION_GRID) - 1)
+    k = np.minimum(pos.astype(int), len(DEGRADATION_GRID) - 2)
+    w = pos - k
+    return table[year, k] * (1 - w) + table[year, k + 1] * w
+
+
+def simulate_block(seed, n_samples, saved, exported, init_inversion, sell_price, ipc, oym_perc, degradation,
+                   discount_rate, proj_duration):
+    """
+    Función para simular un bloque de muestras (ver monte_carlo_blocks). Se ejecuta en el proceso principal o en
+    un proceso del pool.
+
+    Returns:
+        pd.DataFrame: VAN, TIR, periodo de retorno y ahorro del primer año de cada muestra.
+    """
+    rng = np.random.default_rng(seed)
+    size = (n_samples, 1)
+
+    sell = sample(sell_price, rng, size)
+    inflation = sample(ipc, rng, size)
+    oym = sample(oym_perc, rng, size)
+    loss = sample(degradation, rng, size)
+    rate = sample(discount_rate, rng, n_samples)
+    # Cada año del proyecto toma la irradiancia de un año histórico al azar.
+    year = rng.integers(0, len(saved), (n_samples, proj_duration))
+
+    t = np.arange(proj_duration)
+    factor = (1 - loss) ** t
+    savings = (_interpolate(saved, year, factor) + sell * _interpolate(exported, year, factor)) * (1 + inflation) ** t
+    cf = savings - init_inversion * oym * (1 + oym) ** t
+    cf[:, 0] -= init_inversion
+
+    return pd.DataFrame({'npv': npv(rate, cf), 'irr': irr(cf), 'payback': payback_period(cf),
+                         'first_year_savings': savings[:, 0]})
+
+
+def monte_carlo(pv, init_inversion, n_samples=100000, buy_price=0.32, sell_price=(0.06, 0.01), ipc=(0.04, 0.01),
+                oym_perc=(0.02, 0.005), degradation=(0.005, 0.001), discount_rate=0.02, proj_duration=25,
+                seed=None, n_jobs=1, chunk_size=25000, return_samples=False):
+    """
+    Función para simular la incertidumbre del cashflow del proyecto por el método de Monte Carlo.
+
+    Se muestrean el precio de venta, la inflación del precio de la energía (ipc), la operación y mantenimiento,
+    la degradación anual de los paneles y el año de irradiancia de cada año del proyecto (entre los años
+    históricos de pv.irr_data). El balance energético de cada año de irradiancia se tabula una sola vez en
+    función de la degradación, de modo que cada muestra sólo cuesta la aritmética de su cashflow.
+
+    Las muestras se generan por bloques de chunk_size, cada uno con su propia semilla derivada de seed, por lo
+    que el resultado es el mismo con cualquier n_jobs.
+
+    Args:
+        pv (PVProduction): Instalación con la carga e irradiancia del cliente.
+        init_inversion (float): Inversión inicial para la instalación.
+        n_samples (int): Número de muestras.
+        buy_price: Precio de compra en cualquier formato de utils.tariff.price_profile.
+        sell_price, ipc, oym_perc, degradation, discount_rate: Parámetros inciertos. Cada uno puede ser un valor fijo,
+            una tupla (media, desviación típica) de una normal o una función (rng, size) -> np.ndarray.
+        proj_duration (int): Duración del proyecto.
+        seed (int): Semilla para obtener resultados reproducibles.
+        n_jobs (int): Número de procesos. Con 1 todo se calcula en el proceso actual.
+        chunk_size (int): Número de muestras por bloque.
+        return_samples (bool): Si es True también se devuelven todas las muestras.
+
+    Returns: tuple
+        pd.DataFrame con los percentiles P90, P50 y P10 del VAN, la TIR y el periodo de retorno, y pd.DataFrame con las
+        muestras (None si return_samples es False). P90 es el valor que se alcanza o mejora en el 90% de los casos:
+        para el VAN y la TIR es el percentil 10 y para el periodo de retorno el percentil 90.
+    """
+    blocks = monte_carlo_blocks(pv, init_inversion, n_samples=n_samples, buy_price=buy_price, sell_price=sell_price,
+                                ipc=ipc, oym_perc=oym_perc, degradation=degradation, discount_rate=discount_rate,
+                                proj_duration=proj_duration, seed=seed, chunk_size=chunk_size)
+
+    if n_jobs == 1:
+        chunks = [simulate_block(*block) for block in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            chunks = list(executor.map(simulate_block, *zip(*blocks)))
+
+    samples = pd.concat(chunks, ignore_index=True)
+    return summarize(samples), samples if return_samples else None
+
+
+def monte_carlo_blocks(pv, init_inversion, n_samples=100000, buy_price=0.32, sell_price=(0.06, 0.01), ipc=(0.04, 0.01),
+                       oym_perc=(0.02, 0.005), degradation=(0.005, 0.001), discount_rate=0.02, proj_duration=25,
+                       seed=None, chunk_size=25000):
+    """
+    Función para preparar los bloques de muestras de monte_carlo, para repartirlos entre procesos o ejecutarlos
+    uno a uno (p. ej. en un trabajo en segundo plano que informa del progreso).
+
+    Args:
+        Los mismos que monte_carlo.
+
+    Returns:
+        list: Argumentos de simulate_block de cada bloque. Concatenando los resultados de todos los bloques se
+        obtienen las muestras de monte_carlo (ver summarize).
+    """
+    saved, exported = savings_table(pv, buy_price)
+
+    sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (saved, exported, init_inversion, sell_price, ipc, oym_perc, degradation, discount_rate, proj_duration)
+    return [(s, size, *args) for s, size in zip(seeds, sizes)]
+
+
+def summarize(samples):
+    """
+    Función para resumir las muestras de Monte Carlo en los percentiles P90, P50 y P10.
+
+    Args:
+        samples (pd.DataFrame): Muestras (ver simulate_block).
+
+    Returns:
+        pd.DataFrame: P90, P50 y P10 del VAN, la TIR y el periodo de retorno (ver monte_carlo).
+    """
+    # El periodo de retorno NaN (no se recupera la inversión) cuenta como infinito.
+    payback = samples.payback.fillna(np.inf)
+    return pd.DataFrame({
+        'npv': samples.npv.quantile([0.1, 0.5, 0.9]).values,
+        'irr': samples.irr.quantile([0.1, 0.5, 0.9]).values,
+        'payback': payback.quantile([0.9, 0.5, 0.1]).values,
+    }, index=['P90', 'P50', 'P10'])
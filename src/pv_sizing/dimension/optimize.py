@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from pv_sizing.utils.pv_utils import init_inv, typical_year
+from pv_sizing.utils.finance import project_cashflows, npv, irr, payback_period
+from pv_sizing.utils.tariff import price_profile
+
+
+OBJECTIVES = {'npv': 'max', 'irr': 'max', 'payback': 'min'}
+
+
+def specific_yearly_production(pv, panel_models):
+    """
+    Función para calcular la producción anual media por W pico instalado de cada modelo de panel.
+
+    Si todos los modelos comparten tnoct y gamma con la instalación se reutiliza la producción anual
+    media ya calculada en pv. En caso contrario se calcula la producción de todos los modelos en una
+    única pasada vectorizada y un único año tipo.
+
+    Args:
+        pv (PVProduction): Instalación con la carga e irradiancia del cliente.
+        panel_models (dict): Modelos de panel {nombre: {'panel_power', 'price_panel', 'tnoct', 'gamma'}}.
+
+    Returns:
+        pd.DataFrame: Producción anual media [kWh/Wp] con una columna por modelo.
+    """
+    tnoct = [model.get('tnoct', pv.tnoct) for model in panel_models.values()]
+    gamma = [model.get('gamma', pv.gamma) for model in panel_models.values()]
+
+    if all(t == pv.tnoct for t in tnoct) and all(g == pv.gamma for g in gamma):
+        per_wp = pv.myprod_yearly.kWh / (pv.panel_power * pv.num_panels)
+        return pd.DataFrame({name: per_wp for name in panel_models})
+
+    prod = pd.DataFrame(pv.production_matrix(num_panel=1, panel_power=1, tnoct=tnoct, gamma=gamma).T,
+                        index=pv.irr_data.index, columns=list(panel_models))
+    return typical_year(prod, pv.leap_day, pv.step)
+
+
+def optimize_pv_size(pv, num_panels, price_panel, price_inverter, additional_cost, installation_cost_perc,
+                     panel_models=None, objective='npv', buy_price=0.32, sell_price=0.06, ibi=None, oym_perc=0.02,
+                     proj_duration=25, ipc=0.04, discount_rate=0.02):
+    """
+    Función para buscar el número de paneles (y opcionalmente el modelo de panel) con mejor VAN, TIR o
+    periodo de retorno.
+
+    Todos los candidatos se evalúan a la vez con el mismo modelo que PVProduction.economic_analysis: el balance
+    de la carga anual media de pv frente a la producción anual media por W pico se calcula en una matriz
+    candidatos x time steps y el VAN, la TIR y el periodo de retorno con las funciones vectorizadas de
+    utils.finance, sin construir un PVProduction ni un cashflow por candidato.
+
+    Args:
+        pv (PVProduction): Instalación con la carga e irradiancia del cliente.
+        num_panels (array_like): Números de paneles candidatos.
+        price_panel (float): Precio de un panel. Se usa para los modelos que no definen 'price_panel'.
+        price_inverter (float): Precio del inversor.
+        additional_cost (float): Costes adicionales.
+        installation_cost_perc (float): Porcentaje de costes de instalación.
+        panel_models (dict): Modelos de panel candidatos {nombre: {'panel_power', 'price_panel', 'tnoct', 'gamma'}}.
+            Por defecto el panel de pv.
+        objective (str): 'npv', 'irr' o 'payback'.
+        buy_price (float, pd.DataFrame or TimeOfUseTariff): Precio de compra de energía (ver utils.tariff.price_profile).
+        sell_price (float, pd.DataFrame or TimeOfUseTariff): Precio de venta de energía.
+        ibi, oym_perc, proj_duration, ipc, discount_rate: Ver PVProduction.economic_analysis.
+
+    Returns:
+        tuple: Candidato óptimo (pd.Series) y pd.DataFrame con la evaluación de todos los candidatos.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Objective {objective} not supported, use one of {list(OBJECTIVES)}.")
+    if ibi:
+        raise ValueError('This option haven´t been added yet.')
+
+    if panel_models is None:
+        panel_models = {'default': {'panel_power': pv.panel_power, 'price_panel': price_panel}}
+
+    per_wp = specific_yearly_production(pv, panel_models)
+
+    num_panels = np.atleast_1d(num_panels)
+    names = np.repeat(list(panel_models), len(num_panels))
+    num_panel = np.tile(num_panels, len(panel_models))
+    panel_power = np.repeat([model['panel_power'] for model in panel_models.values()], len(num_panels))
+    panel_price = np.repeat([model.get('price_panel', price_panel) for model in panel_models.values()],
+                            len(num_panels))
+    init_inversion = init_inv(num_panel=num_panel, price_panel=panel_price, additional_cost=additional_cost,
+                              installation_cost_perc=installation_cost_perc, price_inverter=price_inverter)
+
+    # Balance de todos los candidatos (filas) en cada time step del año tipo (columnas).
+    load = pv.myload_yearly.AE_kWh.values
+    per_wp = per_wp[list(panel_models)].values.T.repeat(len(num_panels), axis=0)
+    balance = np.nan_to_num(load - per_wp * (panel_power * num_panel)[:, None])
+
+    buy = price_profile(buy_price, pv.myload_yearly.index)
+    sell = price_profile(sell_price, pv.myload_yearly.index)
+    ahorro = buy @ np.nan_to_num(load) - np.clip(balance, 0, None) @ buy - np.clip(balance, None, 0) @ sell
+
+    cf = project_cashflows(ahorro, init_inversion, oym_perc=oym_perc, ipc=ipc, proj_duration=proj_duration)
+
+    results = pd.DataFrame({'model': names, 'num_panel': num_panel, 'panel_power': panel_power,
+                            'init_inversion': init_inversion, 'npv': npv(discount_rate, cf), 'irr': irr(cf),
+                            'payback': payback_period(cf)})
+
+    score = results[objective].astype(float)
+    if OBJECTIVES[objective] == 'max':
+        best = score.fillna(-np.inf).idxmax()
+    else:
+        best = score.fillna(np.inf).idxmin()
+
+    return results.loc[best], results
@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pv_sizing.utils.pv_utils import typical_year
+from pv_sizing.utils.tariff import price_profile
+from pv_sizing.utils.timeseries import _wall_time, resample_energy, infer_step
+from pv_sizing.utils.finance import project_cashflows, npv, irr, payback_period
+
+
+def portfolio_loads(pv, loads):
+    """
+    Función para llevar las cargas de muchos clientes al año tipo de una instalación.
+
+    Args:
+        pv (PVProduction): Instalación (emplazamiento y orientación) común a todos los clientes.
+        loads (pd.DataFrame): Energía consumida por intervalo [kWh], una columna por cliente.
+
+    Returns:
+        pd.DataFrame: Carga anual media de cada cliente en el time step y año tipo de pv.
+    """
+    if not isinstance(loads.index, pd.DatetimeIndex):
+        loads = loads.set_axis(pd.to_datetime(loads.index))
+    loads = _wall_time(loads)
+    if infer_step(loads.index) != pv.step:
+        loads = resample_energy(loads, pv.step)
+    return typical_year(loads, pv.leap_day, pv.step)
+
+
+def portfolio_analysis(pv, loads, num_panels=None, buy_price=0.32, sell_price=0.06, init_inversion=None,
+                       oym_perc=0.02, proj_duration=25, ipc=0.04, discount_rate=0.02, chunk_size=500, path=None):
+    """
+    Función para calcular el balance energético y el ahorro de muchos clientes con la misma instalación.
+
+    La producción se calcula una sola vez (la de pv) y se difunde (broadcast) contra la matriz de cargas,
+    escalada por el número de paneles de cada cliente. Los clientes se procesan por bloques de chunk_size
+    columnas para limitar la memoria. Con balance_mode='per_year' el resultado es la media de los años de
+    irradiancia, como en PVProduction.savings_from_pv.
+
+    Args:
+        pv (PVProduction): Instalación (emplazamiento y orientación) común a todos los clientes.
+        loads (pd.DataFrame): Energía consumida por intervalo [kWh], una columna por cliente.
+        num_panels (float or array_like): Número de paneles de cada cliente. Por defecto el de pv.
+        buy_price: Precio de compra de energía (ver utils.tariff.price_profile).
+        sell_price: Precio de venta de energía, en los mismos formatos que buy_price.
+        init_inversion (float or array_like): Inversión inicial de cada cliente. Si se indica se añaden el VAN,
+            la TIR y el periodo de retorno (ver PVProduction.economic_analysis_batch).
+        oym_perc, proj_duration, ipc, discount_rate: Parámetros del análisis económico.
+        chunk_size (int): Número de clientes por bloque.
+        path (str or Path): Si se indica, los resultados se guardan en un fichero columnar (ver write_portfolio).
+
+    Returns:
+        pd.DataFrame: Una fila por cliente con la energía consumida, producida, comprada, vertida y autoconsumida
+        [kWh], el coste sin y con producción fotovoltaica, la compensación y el ahorro anual [€].
+    """
+    load = portfolio_loads(pv, loads)
+    index = load.index
+
+    if pv.balance_mode == 'per_year':
+        prod = pv.myprod_by_year.values
+    else:
+        prod = pv.myprod_yearly.kWh.values[None, :]
+    prod = np.nan_to_num(prod) / pv.num_panels
+    scale = np.broadcast_to(np.asarray(pv.num_panels if num_panels is None else num_panels, dtype=float),
+                            len(load.columns))
+
+    buy = price_profile(buy_price, index)
+    sell = price_profile(sell_price, index)
+
+    columns = ('load', 'production', 'from_grid', 'into_grid', 'cost_without_pv', 'cost_with_pv', 'compensation')
+    results = {name: np.empty(len(load.columns)) for name in columns}
+
+    for start in range(0, len(load.columns), chunk_size):
+        block = slice(start, start + chunk_size)
+        block_load = np.nan_to_num(load.iloc[:, block].to_numpy(dtype=float))
+        results['load'][block] = block_load.sum(axis=0)
+        results['cost_without_pv'][block] = buy @ block_load
+
+        from_grid, into_grid, cost_with_pv, compensation = (np.zeros(block_load.shape[1]) for _ in range(4))
+        for year_prod in prod:
+            balance = block_load - year_prod[:, None] * scale[block]
+            imported, exported = balance.clip(0, None), -balance.clip(None, 0)
+            from_grid += imported.sum(axis=0)
+            into_grid += exported.sum(axis=0)
+            cost_with_pv += buy @ imported
+            compensation += sell @ exported
+
+        results['production'][block] = prod.sum(axis=1).mean() * scale[block]
+        for name, value in zip(('from_grid', 'into_grid', 'cost_with_pv', 'compensation'),
+                               (from_grid, into_grid, cost_with_pv, compensation)):
+            results[name][block] = value / len(prod)
+
+    results = pd.DataFrame(results, index=load.columns)
+    results['self_consumption'] = results.load - results.from_grid
+    results['savings'] = results.cost_without_pv - results.cost_with_pv + results.compensation
+
+    if init_inversion is not None:
+        cf = project_cashflows(results.savings.values, init_inversion, oym_perc=oym_perc, ipc=ipc,
+                               proj_duration=proj_duration)
+        results['npv'] = npv(discount_rate, cf)
+        results['irr'] = irr(cf)
+        results['payback'] = payback_period(cf)
+
+    if path is not None:
+        write_portfolio(results, path)
+
+    return results
+
+
+def write_portfolio(results, path):
+    """
+    Función para guardar los resultados de una cartera de clientes en un fichero columnar.
+
+    Args:
+        results (pd.DataFrame): Resultados de portfolio_analysis.
+        path (str or Path): Fichero .parquet o .feather. Ambos formatos necesitan pyarrow.
+    """
+    path = Path(path)
+    results = results.rename_axis(results.index.name or 'customer').reset_index()
+
+    if path.suffix == '.parquet':
+        results.to_parquet(path, index=False)
+    elif path.suffix == '.feather':
+        results.to_feather(path)
+    else:
+        raise ValueError(f'File format {path.suffix} not supported, use .parquet or .feather.')
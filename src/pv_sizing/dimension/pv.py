@@ -1,31 +1,92 @@
-import matplotlib.pyplot as plt
 import pandas as pd
 
 import numpy as np
 import numpy_financial as npf
 from itertools import accumulate
-from collections import deque
+from functools import cached_property
 
-from pv_sizing.utils.pv_utils import performance_ratio, european_efficiency_inverter, index_tuple_to_datetime, oneyear_todatetimeindex, \
-                                    idae_pv_prod, cell_temp
+from pv_sizing.utils.pv_utils import performance_ratio, idae_pv_prod, cell_temp, pv_prod_matrix, typical_year, \
+                                    year_matrix, hour_of_year_codes, LEAP_DAY_POLICIES
 from pv_sizing.utils.irradiance import get_irradiance
+from pv_sizing.utils.timeseries import HOUR, align_load_irradiance, infer_step, steps_per_hour
+from pv_sizing.utils.tariff import price_profile
+from pv_sizing.utils.finance import escalate, project_cashflows, npv, irr, payback_period
 
 from pv_sizing.utils.constants import fresnel_fixed
 
 import warnings
-from pandas.core.common import SettingWithCopyWarning
 
 
+# SettingWithCopyWarning es público en pandas.errors desde pandas 1.5 y desaparece con copy-on-write.
+if hasattr(pd.errors, 'SettingWithCopyWarning'):
+    warnings.simplefilter(action="ignore", category=pd.errors.SettingWithCopyWarning)
 
+# Columnas de prod_data con energía por time step (el resto son magnitudes intensivas como T_cell o PR).
+ENERGY_COLUMNS = ('Wh', 'kWh', 'MWh')
 
-warnings.simplefilter(action="ignore", category=SettingWithCopyWarning)
+
+class _Parameter:
+    """
+    Atributo de PVProduction que invalida los resultados cacheados que dependen de él al modificarse. Si se indican
+    choices sólo admite esos valores.
+    """
+
+    def __init__(self, *dependents, choices=None):
+        self.dependents = dependents
+        self.choices = choices
+
+    def __set_name__(self, owner, name):
+        self.name = '_' + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name[1:]) from None
+
+    def __set__(self, obj, value):
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f'{self.name[1:]} must be one of {list(self.choices)}, found {value}.')
+        obj.__dict__[self.name] = value
+        obj.invalidate(*self.dependents)
+
+
+class _Input(_Parameter):
+    """
+    Carga o irradiancia de PVProduction. Al asignarse se normaliza y se alinea de nuevo con la otra serie (ver
+    PVProduction._set_inputs), lo que puede cambiar el time step, por lo que invalida todos los resultados.
+    """
+
+    def __set__(self, obj, value):
+        obj._set_inputs(**{self.name[1:]: value})
+
+
+_PRODUCTION = ('prod_data', '_irr_prod_yearly', 'myirr_yearly', 'myprod_yearly', 'myprod_by_year', '_balance',
+               '_balance_by_year')
+
+BALANCE_MODES = ('typical', 'per_year')
 
 
 class PVProduction:
 
+    load = _Input()
+    irr_data = _Input()
+    tnoct = _Parameter(*_PRODUCTION)
+    gamma = _Parameter(*_PRODUCTION)
+    panel_power = _Parameter(*_PRODUCTION)
+    num_panels = _Parameter(*_PRODUCTION)
+    fresnel_eff = _Parameter(*_PRODUCTION)
+    leap_day = _Parameter('myload_yearly', *_PRODUCTION, choices=LEAP_DAY_POLICIES)
+    compact = _Parameter(*_PRODUCTION)
+    dtype = _Parameter(*_PRODUCTION)
+    balance_mode = _Parameter(choices=BALANCE_MODES)
+
     def __init__(self, load, irr_data,  tnoct, gamma, panel_power, num_panel, fresnel_eff = fresnel_fixed,
                  lat=None, lon=None, start_date=None, end_date=None, tilt=None,
-                 surface_azimuth=None, freq='1H'):
+                 surface_azimuth=None, freq='1H', leap_day='drop', compact=False, dtype=None, align=True, step=None,
+                 balance_mode='typical', irr_tz='UTC', load_tz=None):
         """
         Args:
             load: pd.DataFrame
@@ -43,37 +104,151 @@ class PVProduction:
                 Número de paneles fotovoltaicos
             fresnel_eff: array_like
                 Eficiencia fresnel por cada mes
-
+            leap_day: str
+                Tratamiento del 29 de febrero en las medias anuales: 'drop', 'fold' o 'keep'.
+            compact: bool
+                Si es True prod_data sólo guarda T_cell, PR y kWh, con los factores constantes del PR agrupados
+                en un escalar. El Data Frame completo sigue disponible con pv_production(compact=False).
+            dtype: np.dtype
+                Tipo de dato de prod_data, por ejemplo np.float32 para reducir memoria. Por defecto float64.
+            align: bool
+                Si es True la carga y la irradiancia se llevan a la misma zona horaria y time step antes de
+                calcular el balance (ver utils.timeseries.align_load_irradiance).
+            step: str or pd.Timedelta
+                Time step del balance, por ejemplo '15min'. Por defecto el menor de los de carga e irradiancia.
+            balance_mode: str
+                'typical' calcula el balance energético con la producción del año tipo. 'per_year' lo calcula
+                con la producción de cada año de irradiancia y los resultados económicos usan la media de los
+                años, sin suavizar las horas nubladas y soleadas (ver energy_balance_by_year).
+            irr_tz: str
+                Zona horaria de irr_data si no tiene y la carga sí (por defecto UTC, la de PVGIS). Se usa al
+                alinear las series (ver utils.timeseries.align_load_irradiance).
+            load_tz: str
+                Zona horaria de load si no tiene y la irradiancia sí, p. ej. con los datos de PVGISClient (UTC).
+
+        La producción y las medias anuales se calculan la primera vez que se usan y se guardan en caché.
+        Modificar tnoct, gamma, panel_power, num_panels, fresnel_eff, load o irr_data invalida los resultados
+        que dependen de ellos. Al asignar load o irr_data se normalizan y alinean igual que aquí, y si no se
+        indicó step se vuelve a calcular. Si se modifican in situ los DataFrames de carga o irradiancia hay que
+        llamar a invalidate().
         """
 
         if irr_data is None:
-            self.irr_data = get_irradiance(lat, lon, start_date, end_date, tilt, surface_azimuth, freq)
+            irr_data = get_irradiance(lat, lon, start_date, end_date, tilt, surface_azimuth, freq)
             raise NotImplementedError('API is needed for hourly temperature')
 
-        self.load = load
-        self.irr_data = irr_data
-
-        if len(self.load.columns) > 1:
-            raise ValueError(f'DataFrame found with {len(self.load.columns)}, only 1 is needed.')
+        self._alignment = {'align': align, 'step': step, 'irr_tz': irr_tz, 'load_tz': load_tz}
+        self._set_inputs(load, irr_data)
 
-        if 'AE_kWh' not in self.load.columns.values:
-            self.load.rename(columns={self.load.columns.values[0]: 'AE_kWh'}, inplace = True)
-
-        if not isinstance(self.load.index, pd.DatetimeIndex) or not isinstance(self.load.index, pd.DatetimeIndex):
-            try:
-                self.load.index = pd.to_datetime(self.load.index)
-                self.irr_data.index = pd.to_datetime(self.irr_data.index)
-            except:
-                raise TypeError('Index must be DateTimeIndex')
-        
         self.fresnel_eff = fresnel_eff
         self.tnoct = tnoct
         self.gamma = gamma
         self.panel_power = panel_power
         self.num_panels = num_panel
+        self.leap_day = leap_day
+        self.compact = compact
+        self.dtype = dtype
+
+        self.balance_mode = balance_mode
 
-        self.prod_data = self.pv_production()
-        self.myload_yearly, self.myirr_yearly, self.myprod_yearly = self._yearly_load_and_irr_to_datetime_index()
+    def _set_inputs(self, load=None, irr_data=None):
+        """
+        Función para normalizar la carga y la irradiancia, alinearlas y calcular el time step. Si sólo se indica
+        una de las dos, la otra es la última asignada, tal como se asignó.
+
+        Args:
+            load: pd.DataFrame
+                Carga, con una sola columna (se renombra a AE_kWh).
+            irr_data: pd.DataFrame
+                Irradiancia.
+        """
+        load = self._raw_load if load is None else load
+        irr_data = self._raw_irr if irr_data is None else irr_data
+        self._raw_load, self._raw_irr = load, irr_data
+
+        if len(load.columns) > 1:
+            raise ValueError(f'DataFrame found with {len(load.columns)}, only 1 is needed.')
+
+        if 'AE_kWh' not in load.columns.values:
+            load = load.rename(columns={load.columns.values[0]: 'AE_kWh'})
+
+        if not isinstance(load.index, pd.DatetimeIndex) or not isinstance(irr_data.index, pd.DatetimeIndex):
+            try:
+                load = load.set_axis(pd.to_datetime(load.index))
+                irr_data = irr_data.set_axis(pd.to_datetime(irr_data.index))
+            except:
+                raise TypeError('Index must be DateTimeIndex')
+
+        step = self._alignment['step']
+        if self._alignment['align']:
+            load, irr_data, step = align_load_irradiance(load, irr_data, step, irr_tz=self._alignment['irr_tz'],
+                                                         load_tz=self._alignment['load_tz'])
+        else:
+            step = pd.Timedelta(step) if step is not None else infer_step(irr_data.index)
+
+        self.__dict__.update(_load=load, _irr_data=irr_data, step=step)
+        self.invalidate()
+
+    def invalidate(self, *names):
+        """
+        Función para descartar resultados cacheados.
+
+        Args:
+            *names: str
+                Nombres de los resultados a descartar. Si no se indica ninguno se descartan todos.
+        """
+        for name in names or (*_PRODUCTION, 'myload_yearly'):
+            self.__dict__.pop(name, None)
+
+    @cached_property
+    def prod_data(self):
+        """
+        pd.DataFrame con la producción horaria (ver pv_production).
+        """
+        return self.pv_production()
+
+    @cached_property
+    def myload_yearly(self):
+        """
+        pd.DataFrame con la carga anual media.
+        """
+        return self.mean_yearly_load_data()
+
+    @cached_property
+    def _irr_prod_yearly(self):
+        # Irradiancia, irradiancia total y producción comparten índice: se promedian en una sola pasada sin
+        # concatenarlas en un Data Frame.
+        total = pd.DataFrame({'Irr': self._plane_irradiance()}, index=self.irr_data.index)
+        return typical_year([self.irr_data, total, self.prod_data], self.leap_day, self.step)
+
+    @cached_property
+    def myirr_yearly(self):
+        """
+        pd.DataFrame con la irradiancia anual media.
+        """
+        return self._irr_prod_yearly.iloc[:, :len(self.irr_data.columns) + 1]
+
+    @cached_property
+    def myprod_yearly(self):
+        """
+        pd.DataFrame con la producción anual media.
+        """
+        return self._irr_prod_yearly.iloc[:, len(self.irr_data.columns) + 1:]
+
+    @cached_property
+    def myprod_by_year(self):
+        """
+        pd.DataFrame con la producción [kWh] de cada año de irradiancia (filas) en cada time step del año tipo (columnas).
+        """
+        return year_matrix(self.prod_data.kWh, self.leap_day, self.step)
+
+    @cached_property
+    def _balance(self):
+        return self._energy_balance(self.myprod_yearly.kWh)
+
+    @cached_property
+    def _balance_by_year(self):
+        return self._balance_matrix(self.myprod_by_year)
 
     def mean_yearly_load_data(self):
         """
@@ -82,8 +257,7 @@ class PVProduction:
         Returns: pd.DataFrame con la media anual de la carga
         """
 
-        return oneyear_todatetimeindex(
-            self.load.groupby([self.load.index.month, self.load.index.day, self.load.index.hour]).mean())
+        return typical_year(self.load, self.leap_day, self.step)
 
     def mean_yearly_irr_data(self):
         """
@@ -92,8 +266,7 @@ class PVProduction:
         Returns: pd.DataFrame con la media anual de la irradiancia
         """
 
-        return oneyear_todatetimeindex(self.irr_data.groupby(
-            [self.irr_data.index.month, self.irr_data.index.day, self.irr_data.index.hour]).mean())
+        return typical_year(self.irr_data, self.leap_day, self.step)
     
     def mean_yearly_prod_data(self):
         """
@@ -102,8 +275,7 @@ class PVProduction:
         Returns: pd.DataFrame con la media anual de la producción
         """
 
-        return oneyear_todatetimeindex(self.prod_data.groupby(
-            [self.prod_data.index.month, self.prod_data.index.day, self.prod_data.index.hour]).mean())
+        return typical_year(self.prod_data, self.leap_day, self.step)
     
     def mean_hourly_load_data(self):
         """
@@ -111,7 +283,7 @@ class PVProduction:
 
         Returns: pd.DataFrame con la media horaria de la carga
         """
-        return self.load.groupby([self.load.index.hour]).mean()
+        return self.load.groupby([self.load.index.hour]).mean() * steps_per_hour(self.step)
 
     def mean_hourly_irr_data(self):
         """
@@ -127,26 +299,112 @@ class PVProduction:
 
         Returns: pd.DataFrame con la media horaria de la producción
         """
-        return self.prod_data.groupby([self.prod_data.index.hour]).mean()
+        mean = self.prod_data.groupby([self.prod_data.index.hour]).mean()
+        # Sólo la energía se suma dentro de cada hora; T_cell, PR, etc. son magnitudes intensivas y se promedian.
+        energy = mean.columns.intersection(ENERGY_COLUMNS)
+        mean[energy] = mean[energy] * steps_per_hour(self.step)
+        return mean
+
+    def _plane_irradiance(self):
+        """
+        np.ndarray con la irradiancia total sobre el plano inclinado (Gb(i) + Gd(i) + Gr(i)) en el dtype de
+        la instancia.
+        """
+        dtype = np.dtype(self.dtype or float)
+        irr = self.irr_data['Gb(i)'].to_numpy(dtype, copy=True)
+        irr += self.irr_data['Gd(i)'].to_numpy(dtype)
+        irr += self.irr_data['Gr(i)'].to_numpy(dtype)
+        return irr
 
-    def pv_production(self):
+    def pv_production(self, compact=None):
         """
         Función para crear un Data Frame de irradiancia el Performance Ratio de la instalción y la producción de
         energía para cada time step.
 
+        Args:
+            compact: bool
+                Si es True sólo se guardan T_cell, PR y kWh. Por defecto el modo de la instancia.
+
         Returns: pd.DataFrame con producción horaria
         """
+        compact = self.compact if compact is None else compact
+        dtype = np.dtype(self.dtype or float)
 
         df_prod = pd.DataFrame(index = self.irr_data.index)
 
-        self.irr_data['Irr'] = self.irr_data['Gb(i)'] + self.irr_data['Gd(i)'] + self.irr_data['Gr(i)']
+        # Los arrays se crean ya en dtype y los parámetros se pasan como float de Python para no promover a
+        # float64. irr_data no se modifica.
+        weather = {'T2m': self.irr_data['T2m'].to_numpy(dtype), 'Irr': self._plane_irradiance()}
 
-        df_prod = cell_temp(df_prod, self.irr_data, self.tnoct)
-        df_prod = performance_ratio(df_prod, self.gamma, df_prod.T_cell, self.fresnel_eff.mean())
-        df_prod = idae_pv_prod(df_prod, self.irr_data, self.panel_power, self.num_panels)
+        df_prod = cell_temp(df_prod, weather, float(self.tnoct))
+        df_prod = performance_ratio(df_prod, float(self.gamma), df_prod.T_cell, float(self.fresnel_eff.mean()),
+                                    compact=compact)
+        df_prod = idae_pv_prod(df_prod, weather, float(self.panel_power), float(self.num_panels), compact=compact,
+                               step_hours=self.step / HOUR)
+
+        if self.dtype is not None:
+            df_prod = df_prod.astype(self.dtype, copy=False)
 
         return df_prod
 
+    def production_matrix(self, num_panel, panel_power=None, tnoct=None, gamma=None):
+        """
+        Función para calcular la producción de varias configuraciones a la vez sin crear un PVProduction
+        por configuración.
+
+        Args:
+            num_panel: int or array_like
+                Número de paneles de cada configuración.
+            panel_power: int or array_like
+                Potencia pico del panel de cada configuración. Por defecto la de la instancia.
+            tnoct: int or array_like
+                "Nominal operating cell temperature" de cada configuración. Por defecto la de la instancia.
+            gamma: float or array_like
+                Coeficiente de pérdidas de cada configuración. Por defecto el de la instancia.
+
+        Returns: np.ndarray
+            Matriz (configuraciones x time steps) con la producción en kWh, con las columnas en el orden
+            de self.irr_data.index.
+        """
+        panel_power = self.panel_power if panel_power is None else panel_power
+        tnoct = self.tnoct if tnoct is None else tnoct
+        gamma = self.gamma if gamma is None else gamma
+
+        irr = self.irr_data['Gb(i)'].values + self.irr_data['Gd(i)'].values + self.irr_data['Gr(i)'].values
+
+        return pv_prod_matrix(irr, self.irr_data['T2m'].values, tnoct, gamma, panel_power, num_panel,
+                              self.fresnel_eff.mean(), step_hours=self.step / HOUR)
+
+    def production_by_orientation(self, orientation_irr, num_panel=None, t_amb=None):
+        """
+        Función para calcular la producción de la instalación en varias orientaciones a la vez, a partir de
+        una irradiancia ya transpuesta (ver utils.irradiance.get_irradiance_orientations), sin repetir el
+        cálculo de la posición solar ni crear un PVProduction por orientación.
+
+        Args:
+            orientation_irr: OrientationIrradiance
+                Irradiancia sobre el plano de cada orientación.
+            num_panel: int or array_like
+                Número de paneles de cada orientación. Por defecto el de la instancia.
+            t_amb: float or array_like
+                Temperatura ambiente [ºC] de cada time step. Por defecto la temperatura media de cada hora del
+                año de irr_data.
+
+        Returns: pd.DataFrame
+            Producción [kWh] con una fila por time step de orientation_irr y una columna por orientación.
+        """
+        index = orientation_irr.index
+        if t_amb is None:
+            t_year = typical_year(self.irr_data[['T2m']], 'keep').T2m.values
+            t_amb = t_year[hour_of_year_codes(index, 'keep')[0]]
+
+        prod = pv_prod_matrix(orientation_irr.poa, t_amb, self.tnoct, self.gamma, self.panel_power,
+                              self.num_panels if num_panel is None else num_panel, self.fresnel_eff.mean(),
+                              step_hours=infer_step(index) / HOUR)
+
+        return pd.DataFrame(prod.T, index=index,
+                            columns=pd.MultiIndex.from_frame(orientation_irr.orientations))
+
     def _yearly_load_and_irr_to_datetime_index(self):
         """
         Función para convertir el índice de la media anual de irradiancia y carga a formato datetime.
@@ -154,84 +412,139 @@ class PVProduction:
         Returns: tuple
             Tupla con Data Frames con la carga e irradiancia anual
         """
-        myload = self.mean_yearly_load_data().set_index(
-            pd.date_range('2019-01-01', '2020-01-01', freq='H', inclusive='left'))
-        myirr = self.mean_yearly_irr_data().set_index(
-            pd.date_range('2019-01-01', '2020-01-01', freq='H', inclusive='left'))
-        myprod = self.mean_yearly_prod_data().set_index(
-            pd.date_range('2019-01-01', '2020-01-01', freq='H', inclusive='left'))
-        return myload, myirr, myprod
+        return self.myload_yearly, self.myirr_yearly, self.myprod_yearly
 
-    def energy_balance(self):
+    def energy_balance(self, prod_yearly=None):
         """
         Función para calcular el balance energético anual.
 
+        Args:
+            prod_yearly: pd.Series
+                Producción anual media [kWh] a usar en lugar de la de la instancia. Permite evaluar otras
+                configuraciones reutilizando la carga anual media ya calculada.
+
         Returns: tuple
             Tupla con el balance energético, energía comprada y energía vertida.
         """
-        df_prod = self.pv_production()
+        if prod_yearly is None:
+            return self._balance
+
+        return self._energy_balance(prod_yearly)
 
-        myload, myirr, myprod = self._yearly_load_and_irr_to_datetime_index()
-        balance = myload.AE_kWh - myprod.kWh
+    def _energy_balance(self, prod_yearly):
+        balance = self.myload_yearly.AE_kWh - prod_yearly
 
         comprada = balance.loc[balance > 0].rename('from_grid')
         vertida = balance.loc[balance < 0].rename('into_grid')
 
         return balance, comprada, vertida
 
-    def savings_from_pv(self, buy_price=0.32, sell_price=0.06):
-
+    def energy_balance_by_year(self, prod_by_year=None):
         """
+        Función para calcular el balance energético de cada año de irradiancia frente a la carga anual media.
+
+        A diferencia de energy_balance, la producción no se promedia entre años, por lo que la energía comprada
+        y vertida de cada año recoge sus horas nubladas y soleadas. Todos los años se calculan en una sola
+        operación sobre la matriz años x time steps.
+
         Args:
-            buy_price: float
-                Precio de compra de energía.
-            sell_price: float
-                Precio de venta de energía.
+            prod_by_year: pd.DataFrame
+                Producción [kWh] de cada año (filas) en cada time step del año tipo (columnas) a usar en lugar
+                de la de la instancia (myprod_by_year).
 
-        Returns: tuple
-            Tupla con el coste de energía sin producción fotovoltaica, coste de energía con producción fotovoltacia,
-            ahorro por compensación de energía fotovoltacia y ahorro final.
+        Returns: pd.DataFrame
+            Energía consumida, producida, comprada, vertida y autoconsumida [kWh] de cada año. La dispersión
+            entre años se obtiene con .describe().
         """
+        prod_by_year = self.myprod_by_year if prod_by_year is None else prod_by_year
+        balance = self._balance_by_year if prod_by_year is self.myprod_by_year else self._balance_matrix(prod_by_year)
 
-        balance, comprada, vertida = self.energy_balance()
-        load = self.mean_yearly_load_data().AE_kWh.to_frame()
+        load = np.nansum(self.myload_yearly.AE_kWh.values)
+        production = np.nansum(prod_by_year.values, axis=1)
+        from_grid = balance.clip(0, None).sum(axis=1)
+        into_grid = -balance.clip(None, 0).sum(axis=1)
 
-        if not isinstance(buy_price, (int, float, str)):
+        return pd.DataFrame({'load': load, 'production': production, 'from_grid': from_grid, 'into_grid': into_grid,
+                             'self_consumption': load - from_grid}, index=prod_by_year.index)
 
-            if isinstance(buy_price, pd.DataFrame) and not isinstance(buy_price.index, pd.DatetimeIndex):
-                try:
-                    buy_price.index = pd.to_datetime(buy_price.index)
-                except:
-                    raise TypeError(f"Found type {type(buy_price.index)} but pd.DatetimeIndex was expected.")
+    def _balance_matrix(self, prod_by_year):
+        load = np.nan_to_num(self.myload_yearly.AE_kWh.values)
+        return load - np.nan_to_num(np.asarray(prod_by_year, dtype=float))
 
-            if len(buy_price) != 24:
-                raise ValueError(f"{type(buy_price)} found with length {len(buy_price)} but 24 was expected.")
+    def savings_by_year(self, buy_price=0.32, sell_price=0.06, prod_by_year=None):
+        """
+        Función para calcular el ahorro de cada año de irradiancia (ver energy_balance_by_year).
 
-            while buy_price.index[0].hour != self.load.index[0].hour: #Rotamos la lista hasta que la primera hora del precio coincida con la primera hora de la carga.
-                dq = deque(buy_price.index)
-                dq.rotate(1)
-                buy_price.index = dq
+        Args:
+            buy_price: float, pd.DataFrame or TimeOfUseTariff
+                Precio de compra de energía (ver utils.tariff.price_profile).
+            sell_price: float, pd.DataFrame or TimeOfUseTariff
+                Precio de venta de energía, en los mismos formatos que buy_price.
+            prod_by_year: pd.DataFrame
+                Producción [kWh] de cada año a usar en lugar de la de la instancia.
+
+        Returns: pd.DataFrame
+            Coste de energía sin y con producción fotovoltaica, compensación y ahorro de cada año.
+        """
+        if prod_by_year is None:
+            prod_by_year, balance = self.myprod_by_year, self._balance_by_year
+        else:
+            balance = self._balance_matrix(prod_by_year)
+        index = self.myload_yearly.index
 
-            lst_buy_price = buy_price.loc[:, buy_price.columns[0]].tolist()  #Pasamos a lista los valores del precio
-            lst_buy_price *= len(load)//len(lst_buy_price) #Hacemos que la lista del precio coincida en longitud con el dataframe
-            load['buy_price'] = lst_buy_price #Creamos la columna en el dataframe con el precio horario.
+        buy = price_profile(buy_price, index)
+        sell = price_profile(sell_price, index)
+        load = np.nan_to_num(self.myload_yearly.AE_kWh.values)
 
-            total_df = pd.concat([load, comprada, vertida], axis=1).fillna(0) #Concatenamos la carga, energía comprada y vertida en un mismo DataFrame
+        coste_energia_actual = np.full(len(balance), buy @ load)
+        coste_energia_pv = balance.clip(0, None) @ buy
+        compensacion_pv = -(balance.clip(None, 0) @ sell)
 
-            coste_energia_actual = sum(total_df.buy_price * total_df.AE_kWh)
-            coste_energia_pv = sum(total_df.buy_price * total_df.from_grid)
-            compensacion_pv = -sum(total_df.buy_price * total_df.into_grid)
-        else:
-            coste_energia_actual = sum(buy_price * load.AE_kWh)
-            coste_energia_pv = sum(buy_price * comprada)
-            compensacion_pv = -sum(sell_price * vertida)
+        return pd.DataFrame({'cost_without_pv': coste_energia_actual, 'cost_with_pv': coste_energia_pv,
+                             'compensation': compensacion_pv,
+                             'savings': coste_energia_actual - coste_energia_pv + compensacion_pv},
+                            index=prod_by_year.index)
+
+    def savings_from_pv(self, buy_price=0.32, sell_price=0.06, prod_yearly=None):
+
+        """
+        Args:
+            buy_price: float, pd.DataFrame or TimeOfUseTariff
+                Precio de compra de energía. Puede ser fijo, 24 precios horarios, una serie horaria de un año
+                completo o una tarifa por periodos (ver utils.tariff.price_profile).
+            sell_price: float, pd.DataFrame or TimeOfUseTariff
+                Precio de venta de energía, en los mismos formatos que buy_price.
+            prod_yearly: pd.Series or pd.DataFrame
+                Producción anual media [kWh] a usar en lugar de la de la instancia, o producción de cada año
+                (años x time steps) para calcular la media del ahorro de cada año.
+
+        Returns: tuple
+            Tupla con el coste de energía sin producción fotovoltaica, coste de energía con producción fotovoltacia,
+            ahorro por compensación de energía fotovoltacia y ahorro final. Con balance_mode='per_year' es la media de
+            los años de irradiancia.
+        """
+        if isinstance(prod_yearly, pd.DataFrame) or (prod_yearly is None and self.balance_mode == 'per_year'):
+            return tuple(self.savings_by_year(buy_price, sell_price, prod_by_year=prod_yearly).mean())
+
+        balance, comprada, vertida = self.energy_balance(prod_yearly=prod_yearly)
+        index = self.myload_yearly.index
+
+        buy = price_profile(buy_price, index)
+        sell = price_profile(sell_price, index)
+
+        load = np.nan_to_num(self.myload_yearly.AE_kWh.values)
+        balance = np.nan_to_num(balance.values)
+
+        coste_energia_actual = buy @ load
+        coste_energia_pv = buy @ np.clip(balance, 0, None)
+        compensacion_pv = -(sell @ np.clip(balance, None, 0))
 
         ahorro = coste_energia_actual - coste_energia_pv + compensacion_pv
 
         return coste_energia_actual, coste_energia_pv, compensacion_pv, ahorro
 
     def economic_analysis(self, init_inversion, buy_price=0.32, sell_price=0.06,ibi=None, oym_perc=0.02, proj_duration=25, ipc=0.04,
-                          discount_rate=0.02):
+                          discount_rate=0.02, prod_yearly=None):
         """
         Args:
             init_inversion: float
@@ -246,20 +559,21 @@ class PVProduction:
                 Porecentaje correspondiente a la inflación y devaluación del dinero.
             discount_rate: float
                 Coste de capital que se aplica para determinal el valor presente d eun pago futuro.
-
+            prod_yearly: pd.Series or pd.DataFrame
+                Producción anual media [kWh] o producción de cada año a usar en lugar de la de la instancia
+                (ver savings_from_pv).
 
         Returns: tuple
             El primer valor corresponde a Data Frame con el cashflow, segundo valor corresponde a VAN y el último a TIR.
         """
-        years = np.arange(1, proj_duration + 1)
-        ahorro = self.savings_from_pv(buy_price=buy_price, sell_price=sell_price)[-1]
+        ahorro = self.savings_from_pv(buy_price=buy_price, sell_price=sell_price, prod_yearly=prod_yearly)[-1]
         oym = init_inversion * oym_perc
 
-        initial_inversion = np.zeros(len(years))
+        initial_inversion = np.zeros(proj_duration)
         initial_inversion[0] = init_inversion
 
-        duration_project_savings = np.array([ahorro * ((1 + ipc) ** (year - 1)) for year in years])
-        duration_project_oym = np.array([oym * ((1 + oym_perc) ** (year - 1)) for year in years])
+        duration_project_savings = escalate(ahorro, ipc, proj_duration)
+        duration_project_oym = escalate(oym, oym_perc, proj_duration)
 
         cf = - initial_inversion - duration_project_oym + duration_project_savings
         a_cf = np.array(list(accumulate(cf)))
@@ -272,6 +586,49 @@ class PVProduction:
              'Accumulated cashflow': a_cf})
 
         return df_cf, npf.npv(discount_rate, cf), npf.irr(cf)
+
+    def economic_analysis_batch(self, init_inversion, buy_price=0.32, sell_price=0.06, oym_perc=0.02, proj_duration=25,
+                                ipc=0.04, discount_rate=0.02):
+        """
+        Función para evaluar muchos escenarios financieros a la vez sobre el mismo balance energético.
+
+        Todos los argumentos (salvo proj_duration) pueden ser arrays y se difunden (broadcast) entre sí. Con
+        precios fijos el ahorro es lineal en los precios, por lo que el balance anual se reduce a tres totales
+        de energía (la media de los años de irradiancia con balance_mode='per_year') y cada escenario sólo cuesta la
+        aritmética de su cashflow.
+
+        Args:
+            init_inversion: float or array_like
+                Inversión inicial para la instalación.
+            buy_price: float or array_like
+                Precio fijo de compra de energía.
+            sell_price: float or array_like
+                Precio fijo de venta de energía.
+            oym_perc: float or array_like
+                Porcentaje de la inversión inicial equivalente a gastos en operación y mantenimiento.
+            proj_duration: int
+                Duración del proyecto.
+            ipc: float or array_like
+                Porecentaje correspondiente a la inflación y devaluación del dinero.
+            discount_rate: float or array_like
+                Coste de capital que se aplica para determinal el valor presente d eun pago futuro.
+
+        Returns: tuple
+            Arrays con el VAN, la TIR y el periodo de retorno [años] de cada escenario.
+        """
+        if self.balance_mode == 'per_year':
+            load, from_grid, into_grid = self.energy_balance_by_year()[['load', 'from_grid', 'into_grid']].mean()
+        else:
+            balance = np.nan_to_num(self.energy_balance()[0].values)
+            load = np.nansum(self.myload_yearly.AE_kWh.values)
+            from_grid = balance.clip(0, None).sum()
+            into_grid = -balance.clip(None, 0).sum()
+
+        ahorro = np.asarray(buy_price, dtype=float) * (load - from_grid) + np.asarray(sell_price, dtype=float) * into_grid
+        cf = project_cashflows(ahorro, init_inversion, oym_perc=oym_perc, ipc=ipc, proj_duration=proj_duration)
+        cf, discount_rate = np.broadcast_arrays(cf, np.asarray(discount_rate, dtype=float)[..., None])
+
+        return npv(discount_rate[..., 0], cf), irr(cf), payback_period(cf)
         
     def plot(self, cashflow):
         """
@@ -280,7 +637,10 @@ class PVProduction:
                 Data Frame con el cashflow acumulado del proyecto.
         """
 
-        myload, myirr, myprod = self._yearly_load_and_irr_to_datetime_index()
+        # matplotlib sólo se necesita para esta gráfica, así que no se importa con el módulo.
+        import matplotlib.pyplot as plt
+
+        myload, myprod = self.myload_yearly, self.myprod_yearly
 
         fig, ax = plt.subplots(2)
         cashflow.plot.bar(ax=ax[1])
@@ -0,0 +1,189 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+
+def default_cache_dir():
+    """
+    Función para obtener el directorio de caché de la librería.
+
+    Returns:
+        Path: $PV_SIZING_CACHE_DIR o, por defecto, ~/.cache/pv_sizing.
+    """
+    return Path(os.environ.get('PV_SIZING_CACHE_DIR', Path.home() / '.cache' / 'pv_sizing'))
+
+
+def nbytes(value):
+    """
+    Función para estimar la memoria que ocupa un valor de la caché.
+
+    Args:
+        value: DataFrame, Series, array de numpy, tupla, lista o diccionario de ellos, u otro objeto.
+
+    Returns:
+        int: Tamaño aproximado [bytes]. Para DataFrames y Series incluye el índice y el contenido de las columnas
+        de tipo object.
+    """
+    if hasattr(value, 'memory_usage'):
+        return int(sum(np.atleast_1d(value.memory_usage(deep=True))))
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(nbytes(k) + nbytes(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class Cache:
+
+    def __init__(self, name, maxsize=32, max_bytes=256 * 2 ** 20, directory=None, max_memory_bytes=256 * 2 ** 20):
+        """
+        Caché en memoria (LRU) y en disco para resultados costosos de calcular o descargar.
+
+        Cada valor se guarda en memoria y en un fichero pickle del directorio de la caché. Al superar
+        maxsize entradas o max_memory_bytes en memoria, o max_bytes en disco, se eliminan las entradas usadas
+        hace más tiempo. En memoria siempre se conserva la última entrada, aunque supere max_memory_bytes.
+        Se puede usar desde varios hilos a la vez; un fichero que otro hilo o proceso ya ha borrado cuenta
+        como un fallo de caché.
+
+        Args:
+            name (str): Nombre de la caché. Es el subdirectorio dentro de directory.
+            maxsize (int): Número máximo de entradas en memoria.
+            max_bytes (int): Tamaño máximo en disco [bytes]. Con 0 no se guarda nada en disco.
+            directory (str or Path): Directorio base. Por defecto default_cache_dir().
+            max_memory_bytes (int): Tamaño máximo en memoria [bytes] (ver nbytes).
+        """
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.directory = Path(directory if directory is not None else default_cache_dir()) / name
+        self._memory = OrderedDict()
+        self._sizes = {}
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*args):
+        """
+        Función para obtener la clave de caché de unos argumentos.
+
+        Returns:
+            str: Hash SHA-1 de la representación de los argumentos.
+        """
+        return hashlib.sha1(repr(args).encode()).hexdigest()
+
+    def _path(self, key):
+        return self.directory / f'{key}.pkl'
+
+    def __contains__(self, key):
+        """
+        Returns:
+            bool: True si key está en memoria o en disco.
+        """
+        with self._lock:
+            return key in self._memory or (self.max_bytes > 0 and self._path(key).exists())
+
+    def get(self, key):
+        """
+        Función para obtener un valor de la caché.
+
+        Args:
+            key (str): Clave (ver Cache.key).
+
+        Returns:
+            El valor guardado o None si no está en la caché.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+                # La fecha de modificación marca el último uso para la eviction en disco.
+                os.utime(path)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return None
+
+            self._remember(key, value)
+            return value
+
+    def set(self, key, value):
+        """
+        Función para guardar un valor en la caché.
+
+        Args:
+            key (str): Clave (ver Cache.key).
+            value: Valor serializable con pickle.
+        """
+        with self._lock:
+            self._remember(key, value)
+            if self.max_bytes <= 0:
+                return
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Se escribe en un fichero temporal y se renombra para no dejar ficheros a medias.
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, self._path(key))
+            self._evict()
+
+    @property
+    def memory_bytes(self):
+        """
+        int con el tamaño de las entradas en memoria [bytes] (ver nbytes).
+        """
+        return self._memory_bytes
+
+    def _remember(self, key, value):
+        self._forget(key)
+        self._memory[key] = value
+        self._sizes[key] = nbytes(value)
+        self._memory_bytes += self._sizes[key]
+        while len(self._memory) > self.maxsize or (len(self._memory) > 1 and
+                                                   self._memory_bytes > self.max_memory_bytes):
+            self._forget(next(iter(self._memory)))
+
+    def _forget(self, key):
+        if key in self._memory:
+            del self._memory[key]
+            self._memory_bytes -= self._sizes.pop(key)
+
+    def _evict(self):
+        # Otro proceso que comparta el directorio puede haber borrado ya alguno de los ficheros.
+        files = []
+        for path in self.directory.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        size = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in files[:-1]:
+            if size <= self.max_bytes:
+                break
+            size -= file_size
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        """
+        Función para vaciar la caché en memoria y en disco.
+        """
+        with self._lock:
+            self._memory.clear()
+            self._sizes.clear()
+            self._memory_bytes = 0
+            for path in self.directory.glob('*.pkl'):
+                path.unlink(missing_ok=True)
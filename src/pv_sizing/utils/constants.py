@@ -2,3 +2,12 @@ import numpy as np
 
 # Eficiencia media mensual. Valores estándar.
 fresnel_fixed = np.array([0.948, 0.926, 0.913, 0.898, 0.914, 0.886, 0.883, 0.902, 0.887, 0.934, 0.937, 0.944])
+
+# Factores constantes del Performance Ratio.
+# CAIDA DE TENSIÓN DE 0,8% PARA CC
+PR_CC = 0.992
+PR_DISP = 1
+# CAIDA DEL 1,5% PARTE AC
+PR_AC = 0.985
+# Eficiencias del inversor [%] para el cálculo de la Eficiencia Europea.
+INVERTER_ETA = {'eta5': 60, 'eta10': 80, 'eta20': 89, 'eta30': 91, 'eta50': 92, 'eta100': 93}
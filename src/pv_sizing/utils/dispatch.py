@@ -0,0 +1,189 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _soc_kernel(net, capacity, max_charge, max_discharge, eta_charge, eta_discharge, soc_min, soc,
+                soc_out, charge_out, discharge_out, from_grid_out, into_grid_out):
+    """
+    Recursión del estado de carga. Con numba se compila; sin numba se ejecuta sobre listas de Python, que son
+    bastante más rápidas que los arrays de numpy elemento a elemento.
+    """
+    for t in range(len(net)):
+        energy = net[t]
+        charge = 0.0
+        discharge = 0.0
+        if energy < 0:
+            charge = max(min(-energy, max_charge, (capacity - soc) / eta_charge), 0.0)
+            soc += charge * eta_charge
+            energy += charge
+        elif energy > 0:
+            discharge = max(min(energy, max_discharge, (soc - soc_min) * eta_discharge), 0.0)
+            soc -= discharge / eta_discharge
+            energy -= discharge
+
+        soc_out[t] = soc
+        charge_out[t] = charge
+        discharge_out[t] = discharge
+        from_grid_out[t] = max(energy, 0.0)
+        into_grid_out[t] = max(-energy, 0.0)
+    return soc
+
+
+def _soc_batch_kernel(net, buy, sell, capacity, max_charge, max_discharge, eta_charge, eta_discharge, soc_min, soc,
+                      totals):
+    """
+    Recursión del estado de carga de varios candidatos a la vez (capacity, max_charge, max_discharge, soc_min y soc
+    son arrays con un valor por candidato) sobre la misma serie net. totals (4 x candidatos) acumula la energía
+    comprada y vertida y su coste e ingreso con los precios buy y sell de cada time step. Se compila con numba.
+    """
+    for t in range(len(net)):
+        for k in range(len(soc)):
+            energy = net[t]
+            if energy < 0:
+                charge = max(min(-energy, max_charge[k], (capacity[k] - soc[k]) / eta_charge), 0.0)
+                soc[k] += charge * eta_charge
+                energy += charge
+            elif energy > 0:
+                discharge = max(min(energy, max_discharge[k], (soc[k] - soc_min[k]) * eta_discharge), 0.0)
+                soc[k] -= discharge / eta_discharge
+                energy -= discharge
+
+            if energy > 0:
+                totals[0, k] += energy
+                totals[2, k] += buy[t] * energy
+            elif energy < 0:
+                totals[1, k] -= energy
+                totals[3, k] -= sell[t] * energy
+
+
+def _soc_batch_numpy(net, buy, sell, capacity, max_charge, max_discharge, eta_charge, eta_discharge, soc_min, soc,
+                     totals, block=4096):
+    """
+    Misma recursión que _soc_batch_kernel sin numba: una pasada sobre el tiempo con operaciones de numpy sobre el
+    eje de candidatos. Para hacer sólo cuatro operaciones por time step el estado de carga se lleva dividido por
+    eta_charge y la descarga multiplicada por 1 / (eta_charge * eta_discharge). La energía cargada y descargada de
+    cada time step se guarda en un bloque de filas y se acumula con un producto de matrices por bloque.
+    """
+    eta = eta_charge * eta_discharge
+    room, floor = capacity / eta_charge, soc_min / eta_charge
+    max_discharge = max_discharge / eta
+    soc = soc / eta_charge
+
+    # Pesos de cada time step para acumular energía cargada, su valor, energía descargada y su valor.
+    weights = np.zeros((len(net), 4))
+    weights[net < 0, 0] = 1
+    weights[net < 0, 1] = sell[net < 0]
+    weights[net > 0, 2] = eta
+    weights[net > 0, 3] = eta * buy[net > 0]
+
+    flows = np.zeros((block, len(soc)))
+    flow_totals = np.zeros((4, len(soc)))
+    for start in range(0, len(net), block):
+        for row, energy in zip(flows, net[start:start + block].tolist()):
+            if energy < 0:
+                np.subtract(room, soc, out=row)
+                np.minimum(row, max_charge, out=row)
+                np.clip(row, 0.0, -energy, out=row)
+                soc += row
+            elif energy > 0:
+                np.subtract(soc, floor, out=row)
+                np.minimum(row, max_discharge, out=row)
+                np.clip(row, 0.0, energy / eta, out=row)
+                soc -= row
+        part = weights[start:start + block]
+        flow_totals += part.T @ flows[:len(part)]
+
+    charged, charged_value, discharged, discharged_value = flow_totals
+    deficit, surplus = net.clip(0, None), -net.clip(None, 0)
+    totals += [deficit.sum() - discharged, surplus.sum() - charged,
+               buy @ deficit - discharged_value, sell @ surplus - charged_value]
+
+
+if njit is not None:
+    _soc_kernel_compiled = njit(cache=True)(_soc_kernel)
+    _soc_batch_kernel_compiled = njit(cache=True)(_soc_batch_kernel)
+
+
+def simulate_battery(net_load, capacity, power=None, round_trip_eff=0.9, dod=0.9, soc_init=None, step_hours=1):
+    """
+    Función para simular hora a hora (o time step a time step) la carga y descarga de una batería.
+
+    En cada time step el excedente fotovoltaico (net_load < 0) carga la batería y el déficit (net_load > 0)
+    se cubre descargándola, dentro de los límites de potencia y de profundidad de descarga. Lo que la
+    batería no absorbe o no cubre se vierte o se compra a la red. La recursión se compila con numba si
+    está instalado.
+
+    Args:
+        net_load (array_like): Carga menos producción [kWh] de cada time step.
+        capacity (float): Capacidad útil nominal de la batería [kWh].
+        power (float): Potencia máxima de carga y descarga [kW]. Por defecto sin límite.
+        round_trip_eff (float): Eficiencia de un ciclo completo. Se reparte a partes iguales entre carga y descarga.
+        dod (float): Profundidad de descarga máxima.
+        soc_init (float): Estado de carga inicial [kWh]. Por defecto el mínimo, capacity * (1 - dod).
+        step_hours (float): Duración de un time step [h].
+
+    Returns:
+        dict: Arrays con el estado de carga al final de cada time step [kWh], la energía cargada y descargada
+        [kWh, lado AC], la energía comprada y vertida [kWh].
+    """
+    net = np.nan_to_num(np.asarray(net_load, dtype=float))
+    # Todos los escalares se pasan como float: con numba cada combinación de int y float se compilaría aparte.
+    capacity = float(capacity)
+    eta = float(np.sqrt(round_trip_eff))
+    soc_min = capacity * (1 - float(dod))
+    soc_init = soc_min if soc_init is None else float(soc_init)
+    max_energy = np.inf if power is None else float(power) * float(step_hours)
+
+    args = (capacity, max_energy, max_energy, eta, eta, soc_min, soc_init)
+    if njit is not None:
+        outputs = [np.empty(len(net)) for _ in range(5)]
+        _soc_kernel_compiled(net, *args, *outputs)
+    else:
+        outputs = [[0.0] * len(net) for _ in range(5)]
+        _soc_kernel(net.tolist(), *args, *outputs)
+
+    return dict(zip(('soc', 'charge', 'discharge', 'from_grid', 'into_grid'), map(np.asarray, outputs)))
+
+
+def simulate_battery_batch(net_load, capacity, power=None, round_trip_eff=0.9, dod=0.9, step_hours=1, buy_price=1.0,
+                           sell_price=1.0):
+    """
+    Función para simular a la vez varias baterías (capacidad y potencia) sobre la misma serie net_load.
+
+    Es la misma simulación que simulate_battery, pero el estado de carga de todos los candidatos se avanza en
+    una sola pasada sobre el tiempo y sólo se devuelven los totales de cada candidato, sin guardar series.
+
+    Args:
+        net_load (array_like): Carga menos producción [kWh] de cada time step.
+        capacity (array_like): Capacidad útil nominal de cada candidato [kWh].
+        power (array_like): Potencia máxima de carga y descarga de cada candidato [kW]. Por defecto sin límite.
+        round_trip_eff (float): Eficiencia de un ciclo completo. Se reparte a partes iguales entre carga y descarga.
+        dod (float): Profundidad de descarga máxima.
+        step_hours (float): Duración de un time step [h].
+        buy_price (float or array_like): Precio de compra de cada time step.
+        sell_price (float or array_like): Precio de venta de cada time step.
+
+    Returns:
+        dict: Arrays con la energía comprada y vertida [kWh], el coste de la energía comprada y el ingreso por la
+        vertida de cada candidato. El estado de carga inicial es el mínimo.
+    """
+    net = np.nan_to_num(np.asarray(net_load, dtype=float))
+    buy = np.broadcast_to(np.asarray(buy_price, dtype=float), net.shape)
+    sell = np.broadcast_to(np.asarray(sell_price, dtype=float), net.shape)
+    capacity, power = np.broadcast_arrays(np.atleast_1d(np.asarray(capacity, dtype=float)),
+                                          np.inf if power is None else np.asarray(power, dtype=float))
+    eta = float(np.sqrt(round_trip_eff))
+    soc_min = capacity * (1 - float(dod))
+    max_energy = power * float(step_hours)
+
+    totals = np.zeros((4, len(capacity)))
+    kernel = _soc_batch_kernel_compiled if njit is not None else _soc_batch_numpy
+    kernel(net, np.ascontiguousarray(buy), np.ascontiguousarray(sell), np.ascontiguousarray(capacity),
+           np.ascontiguousarray(max_energy), np.ascontiguousarray(max_energy), eta, eta, soc_min, soc_min.copy(),
+           totals)
+
+    return dict(zip(('from_grid', 'into_grid', 'cost', 'revenue'), totals))
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+
+METHODS = ('minmax', 'lttb')
+
+
+def minmax_indices(y, n_out):
+    """
+    Función para reducir una serie a como mucho n_out puntos conservando el mínimo y el máximo de cada tramo.
+
+    La serie se divide en n_out / 2 tramos de igual longitud y de cada uno se toman las posiciones del mínimo y
+    del máximo, de modo que los picos (p. ej. de la carga) siguen apareciendo en la gráfica.
+
+    Args:
+        y (array_like): Valores de la serie.
+        n_out (int): Número máximo de puntos.
+
+    Returns:
+        np.ndarray: Posiciones de los puntos elegidos, ordenadas.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    size = -(-n // max(n_out // 2, 1))
+    bins = -(-n // size)
+    # Se rellena con NaN hasta completar el último tramo para trabajar con una matriz tramos x puntos.
+    padded = np.full(bins * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(bins, size)
+
+    # Los tramos sin ningún valor (todo NaN) se representan con su primer punto.
+    empty = np.isnan(padded).all(axis=1)
+    padded[empty, 0] = 0
+    offset = np.arange(bins) * size
+    indices = np.concatenate([offset + np.nanargmin(padded, axis=1), offset + np.nanargmax(padded, axis=1)])
+    return np.unique(indices)
+
+
+def lttb_indices(y, n_out, x=None):
+    """
+    Función para reducir una serie a n_out puntos con el algoritmo Largest-Triangle-Three-Buckets (LTTB).
+
+    Se conservan el primer y el último punto, y de cada uno de los n_out - 2 tramos intermedios el punto que forma el
+    triángulo de mayor área con el punto elegido en el tramo anterior y la media del tramo siguiente.
+
+    Args:
+        y (array_like): Valores de la serie.
+        n_out (int): Número de puntos.
+        x (array_like): Posición de cada valor. Por defecto equiespaciados.
+
+    Returns:
+        np.ndarray: Posiciones de los puntos elegidos, ordenadas.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n) if n <= n_out else np.array([0, n - 1])[:n_out]
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Media de cada tramo, que hace de tercer vértice del triángulo del tramo anterior.
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    mean_x, mean_y = np.append(mean_x[1:], x[-1]), np.append(mean_y[1:], y[-1])
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i, (start, stop) in enumerate(zip(edges[:-1], edges[1:])):
+        area = np.abs((x[a] - mean_x[i]) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (mean_y[i] - y[a]))
+        # NaN (huecos en la serie) nunca se eligen salvo que el tramo entero sea NaN.
+        a = start + (int(np.nanargmax(area)) if not np.isnan(area).all() else 0)
+        indices[i + 1] = a
+    return indices
+
+
+def visible_slice(index, x_range=None):
+    """
+    Función para obtener las posiciones de una serie que caen dentro de un rango del eje x.
+
+    Args:
+        index (pd.Index): Índice (eje x) de la serie, ordenado.
+        x_range (tuple): Inicio y fin del rango visible. None para toda la serie.
+
+    Returns:
+        slice: Posiciones visibles, con un punto más a cada lado para que la línea llegue a los bordes.
+    """
+    if x_range is None:
+        return slice(0, len(index))
+    start, end = x_range
+    if isinstance(index, pd.DatetimeIndex):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+    return slice(max(index.searchsorted(start, side='left') - 1, 0), index.searchsorted(end, side='right') + 1)
+
+
+def downsample(series, n_out=2000, x_range=None, method='minmax'):
+    """
+    Función para reducir una serie a los puntos que merece la pena dibujar en el rango visible del eje x.
+
+    Args:
+        series (pd.Series): Serie a dibujar, con índice ordenado.
+        n_out (int): Número máximo de puntos (del orden del ancho de la gráfica en píxeles).
+        x_range (tuple): Inicio y fin del rango visible. None para toda la serie.
+        method (str): 'minmax' (mínimo y máximo de cada tramo, conserva los picos) o 'lttb' (ver lttb_indices).
+
+    Returns:
+        pd.Series: Puntos elegidos de la serie.
+    """
+    if method not in METHODS:
+        raise ValueError(f'method must be one of {METHODS}, found {method}.')
+
+    visible = series.iloc[visible_slice(series.index, x_range)]
+    if method == 'minmax':
+        indices = minmax_indices(visible.values, n_out)
+    else:
+        indices = lttb_indices(visible.values, n_out)
+    return visible.iloc[indices]
@@ -0,0 +1,160 @@
+import numpy as np
+
+
+def payback_period(cashflow):
+    """
+    Función para calcular el periodo de retorno de la inversión.
+
+    Args:
+        cashflow (array_like): Cashflow anual del proyecto. Si es una matriz, cada fila es un proyecto.
+
+    Returns:
+        float or np.ndarray: Años hasta que el cashflow acumulado deja de ser negativo, interpolando
+        linealmente dentro del año. NaN si la inversión no se recupera en la duración del proyecto.
+    """
+    cf = np.asarray(cashflow, dtype=float)
+    a_cf = np.cumsum(cf, axis=-1)
+
+    recovered = a_cf >= 0
+    year = np.argmax(recovered, axis=-1)
+    found = recovered.any(axis=-1)
+
+    cf_year = np.take_along_axis(cf, year[..., None], axis=-1)[..., 0]
+    a_cf_year = np.take_along_axis(a_cf, year[..., None], axis=-1)[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(cf_year > 0, 1 - a_cf_year / cf_year, 0.0)
+
+    return np.where(found, year + fraction, np.nan)[()]
+
+
+def escalate(value, rate, proj_duration):
+    """
+    Función para calcular la serie anual de un valor que crece a una tasa constante.
+
+    Args:
+        value (float or array_like): Valor del primer año.
+        rate (float or array_like): Tasa de crecimiento anual.
+        proj_duration (int): Duración del proyecto en años.
+
+    Returns:
+        np.ndarray: Matriz (..., proj_duration) con value * (1 + rate) ** (año - 1).
+    """
+    value, rate = np.broadcast_arrays(np.asarray(value, dtype=float), np.asarray(rate, dtype=float))
+    return value[..., None] * (1 + rate[..., None]) ** np.arange(proj_duration)
+
+
+def project_cashflows(savings, init_inversion, oym_perc=0.02, ipc=0.04, proj_duration=25):
+    """
+    Función para calcular el cashflow anual de uno o varios proyectos con difusión (broadcast) de sus parámetros.
+
+    Sigue el mismo modelo que PVProduction.economic_analysis: el ahorro crece con el IPC, la operación y
+    mantenimiento parte de init_inversion * oym_perc y crece a oym_perc, y la inversión se paga el primer año.
+
+    Args:
+        savings (float or array_like): Ahorro del primer año.
+        init_inversion (float or array_like): Inversión inicial.
+        oym_perc (float or array_like): Porcentaje de la inversión inicial destinado a operación y mantenimiento.
+        ipc (float or array_like): Inflación anual aplicada al ahorro.
+        proj_duration (int): Duración del proyecto en años.
+
+    Returns:
+        np.ndarray: Matriz (..., proj_duration) con el cashflow anual.
+    """
+    init_inversion = np.asarray(init_inversion, dtype=float)
+    cf = escalate(savings, ipc, proj_duration) - escalate(init_inversion * oym_perc, oym_perc, proj_duration)
+    cf[..., 0] -= np.broadcast_to(init_inversion, cf.shape[:-1])
+    return cf
+
+
+def npv(rate, cashflow):
+    """
+    Función vectorizada para calcular el VAN, con la misma convención que numpy_financial.npv.
+
+    Args:
+        rate (float or array_like): Tasa de descuento de cada proyecto.
+        cashflow (array_like): Cashflow anual. Si es una matriz, cada fila es un proyecto.
+
+    Returns:
+        float or np.ndarray: VAN de cada proyecto.
+    """
+    cf = np.asarray(cashflow, dtype=float)
+    rate = np.asarray(rate, dtype=float)[..., None]
+    return (cf / (1 + rate) ** np.arange(cf.shape[-1])).sum(axis=-1)[()]
+
+
+def _npv_and_derivative(cf_t, rate):
+    """
+    VAN y su derivada respecto a la tasa por el método de Horner. cf_t tiene un año por fila y un proyecto por columna.
+    """
+    v = 1 / (1 + rate)
+    f = cf_t[-1].copy()
+    df = np.zeros_like(f)
+    for c in cf_t[-2::-1]:
+        df = df * v + f
+        f = f * v + c
+    return f, -df * v ** 2
+
+
+# Tasas en las que se busca un cambio de signo del VAN antes de refinar la TIR.
+_IRR_GRID = np.concatenate([np.linspace(-0.99, -0.1, 12), np.linspace(-0.05, 0.5, 23), np.geomspace(0.6, 10, 10)])
+
+
+def irr(cashflow, tol=1e-10, maxiter=100):
+    """
+    Función vectorizada para calcular la TIR de varios proyectos a la vez.
+
+    Primero se evalúa el VAN de todos los proyectos en una rejilla de tasas y se elige, para cada uno, el
+    cambio de signo más cercano a 0 (la misma raíz que numpy_financial.irr). Después se refina con el método
+    de Newton protegido con bisección: si el paso de Newton sale del intervalo que contiene la raíz se toma
+    el punto medio. En cada iteración sólo se evalúan los proyectos que aún no han convergido.
+
+    Args:
+        cashflow (array_like): Cashflow anual. Si es una matriz, cada fila es un proyecto.
+        tol (float): Tolerancia en la TIR.
+        maxiter (int): Número máximo de iteraciones.
+
+    Returns:
+        float or np.ndarray: TIR de cada proyecto. NaN si el VAN no cambia de signo entre -99% y 1000%.
+    """
+    cf = np.asarray(cashflow, dtype=float)
+    shape = cf.shape[:-1]
+    cf = cf.reshape(-1, cf.shape[-1])
+    cf_t = np.ascontiguousarray(cf.T)
+    t = np.arange(cf.shape[-1])
+
+    f_grid = cf @ ((1 + _IRR_GRID[None, :]) ** -t[:, None])
+    # Una raíz exacta en un punto de la rejilla cuenta, pero no un VAN nulo en los dos extremos (cashflow nulo).
+    sign_a, sign_b = np.sign(f_grid[:, :-1]), np.sign(f_grid[:, 1:])
+    sign_change = (sign_a * sign_b < 0) | ((sign_a == 0) != (sign_b == 0))
+    distance = np.where(sign_change, np.abs(_IRR_GRID[:-1] + _IRR_GRID[1:]), np.inf)
+    bracket = np.argmin(distance, axis=1)
+    found = sign_change[np.arange(len(cf)), bracket]
+
+    rate = np.full(len(cf), np.nan)
+    active = np.flatnonzero(found)
+    lo, hi = _IRR_GRID[bracket[active]], _IRR_GRID[bracket[active] + 1]
+    f_lo = f_grid[active, bracket[active]]
+    x = (lo + hi) / 2
+
+    for _ in range(maxiter):
+        if not len(active):
+            break
+        f, df = _npv_and_derivative(cf_t[:, active], x)
+
+        # Reducimos el intervalo manteniendo la raíz dentro.
+        same_as_lo = np.sign(f) == np.sign(f_lo)
+        lo, f_lo, hi = np.where(same_as_lo, x, lo), np.where(same_as_lo, f, f_lo), np.where(same_as_lo, hi, x)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = x - f / df
+        inside = (newton > np.minimum(lo, hi)) & (newton < np.maximum(lo, hi))
+        new_x = np.where(inside, newton, (lo + hi) / 2)
+
+        new_x = np.where(f == 0, x, new_x)
+        converged = np.abs(new_x - x) < tol
+        rate[active[converged]] = new_x[converged]
+
+        keep = ~converged
+        active, x, lo, hi, f_lo = active[keep], new_x[keep], lo[keep], hi[keep], f_lo[keep]
+
+    return rate.reshape(shape)[()]
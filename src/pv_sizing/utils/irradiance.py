@@ -1,27 +1,173 @@
-from pvlib import location, irradiance
+import numpy as np
 import pandas as pd
 
+from pv_sizing.utils.cache import Cache
 
-def get_irradiance(lat, lon, start_date, end_date, tilt, surface_azimuth, freq='1H'):
-    # Create location object to store lat, lon, timezone
-    site_location = location.Location(lat, lon)
-    # Creates one day's worth of 1 hour intervals
-    times = pd.date_range(start=start_date, end=end_date, freq=freq)
-    # Generate clearsky data using the Ineichen model, which is the default
-    # The get_clearsky method returns a dataframe with values for GHI, DNI,
-    # and DHI
-    clearsky = site_location.get_clearsky(times)
-    # Get solar azimuth and zenith to pass to the transposition function
-    solar_position = site_location.get_solarposition(times=times)
+
+# Caché de get_irradiance, en memoria y en disco (ver utils.cache.Cache).
+irradiance_cache = Cache('irradiance')
+
+
+def get_irradiance(lat, lon, start_date, end_date, tilt, surface_azimuth, freq='1H', model='ineichen', cache=True):
+    """
+    Función para calcular la irradiancia de cielo despejado sobre el plano de los paneles con pvlib.
+
+    El resultado se guarda en irradiance_cache con clave (lat, lon, tilt, surface_azimuth, fechas, freq, model),
+    de modo que repetir el cálculo para el mismo emplazamiento no vuelve a llamar a pvlib.
+
+    Args:
+        lat (float): Latitud.
+        lon (float): Longitud.
+        start_date, end_date (str or pd.Timestamp): Periodo.
+        tilt (float): Inclinación de los paneles.
+        surface_azimuth (float): Azimut de los paneles.
+        freq (str): Time step.
+        model (str): Modelo de cielo despejado de pvlib.
+        cache (bool): Si es False no se lee ni se escribe la caché.
+
+    Returns:
+        pd.DataFrame: Irradiancia global horizontal (GHI) y sobre el plano de los paneles (POA) [W/m2].
+    """
+    key = Cache.key(float(lat), float(lon), float(tilt), float(surface_azimuth), pd.Timestamp(start_date).isoformat(),
+                    pd.Timestamp(end_date).isoformat(), str(freq), model)
+    if cache:
+        cached = irradiance_cache.get(key)
+        if cached is not None:
+            return cached.copy()
+
+    # pvlib is imported on first use, importing this module only costs numpy and pandas
+    from pvlib import irradiance
+
+    # Clear-sky and solar position do not depend on the orientation and are cached on their own
+    sky = clearsky_solar_position(lat, lon, start_date, end_date, freq=freq, model=model, cache=cache)
     # Use the get_total_irradiance function to transpose the GHI to POA
     POA_irradiance = irradiance.get_total_irradiance(
         surface_tilt=tilt,
         surface_azimuth=surface_azimuth,
-        dni=clearsky['dni'],
-        ghi=clearsky['ghi'],
-        dhi=clearsky['dhi'],
-        solar_zenith=solar_position['apparent_zenith'],
-        solar_azimuth=solar_position['azimuth'])
+        dni=sky['dni'],
+        ghi=sky['ghi'],
+        dhi=sky['dhi'],
+        solar_zenith=sky['apparent_zenith'],
+        solar_azimuth=sky['azimuth'])
     # Return DataFrame with only GHI and POA
-    return pd.DataFrame({'GHI': clearsky['ghi'],
-                         'POA': POA_irradiance['poa_global']})
+    result = pd.DataFrame({'GHI': sky['ghi'],
+                           'POA': POA_irradiance['poa_global']})
+
+    if cache:
+        irradiance_cache.set(key, result)
+    return result.copy() if cache else result
+
+
+def clearsky_solar_position(lat, lon, start_date, end_date, freq='1H', model='ineichen', cache=True):
+    """
+    Función para calcular con pvlib la irradiancia de cielo despejado y la posición solar, que no dependen
+    de la orientación de los paneles. El resultado se guarda en irradiance_cache.
+
+    Args:
+        lat (float): Latitud.
+        lon (float): Longitud.
+        start_date, end_date (str or pd.Timestamp): Periodo.
+        freq (str): Time step.
+        model (str): Modelo de cielo despejado de pvlib.
+        cache (bool): Si es False no se lee ni se escribe la caché.
+
+    Returns:
+        pd.DataFrame: ghi, dni, dhi [W/m2], apparent_zenith y azimuth [º] de cada time step.
+    """
+    key = Cache.key('clearsky_solar_position', float(lat), float(lon), pd.Timestamp(start_date).isoformat(),
+                    pd.Timestamp(end_date).isoformat(), str(freq), model)
+    if cache:
+        cached = irradiance_cache.get(key)
+        if cached is not None:
+            return cached.copy()
+
+    from pvlib import location
+
+    site_location = location.Location(lat, lon)
+    times = pd.date_range(start=start_date, end=end_date, freq=freq)
+    clearsky = site_location.get_clearsky(times, model=model)
+    solar_position = site_location.get_solarposition(times=times)
+    result = pd.concat([clearsky[['ghi', 'dni', 'dhi']], solar_position[['apparent_zenith', 'azimuth']]], axis=1)
+
+    if cache:
+        irradiance_cache.set(key, result)
+    return result.copy() if cache else result
+
+
+class OrientationIrradiance:
+
+    def __init__(self, sky, tilts, surface_azimuths, albedo=0.25):
+        """
+        Irradiancia sobre el plano de varias orientaciones, transpuesta en una sola pasada vectorizada con
+        el modelo isotrópico (el modelo por defecto de pvlib.irradiance.get_total_irradiance).
+
+        Args:
+            sky (pd.DataFrame): Irradiancia de cielo despejado y posición solar (ver clearsky_solar_position).
+            tilts (array_like): Inclinación de cada orientación [º].
+            surface_azimuths (array_like): Azimut de cada orientación [º]. Se difunde (broadcast) con tilts.
+            albedo (float): Albedo del suelo.
+
+        Atributos:
+            orientations (pd.DataFrame): Inclinación y azimut de cada orientación.
+            index (pd.DatetimeIndex): Índice temporal.
+            beam, diffuse, ground (np.ndarray): Componentes directa, difusa y reflejada [W/m2] como matrices
+                orientaciones x time steps.
+        """
+        tilts, surface_azimuths = np.broadcast_arrays(np.atleast_1d(np.asarray(tilts, dtype=float)),
+                                                      np.atleast_1d(np.asarray(surface_azimuths, dtype=float)))
+        self.orientations = pd.DataFrame({'tilt': tilts, 'surface_azimuth': surface_azimuths})
+        self.index = sky.index
+
+        tilt = np.radians(tilts)[:, None]
+        zenith = np.radians(sky['apparent_zenith'].values)
+        cos_aoi = (np.cos(zenith) * np.cos(tilt) + np.sin(zenith) * np.sin(tilt) *
+                   np.cos(np.radians(sky['azimuth'].values - surface_azimuths[:, None])))
+
+        self.beam = np.maximum(sky['dni'].values * cos_aoi, 0)
+        self.diffuse = sky['dhi'].values * (1 + np.cos(tilt)) / 2
+        self.ground = sky['ghi'].values * albedo * (1 - np.cos(tilt)) / 2
+
+    @property
+    def poa(self):
+        """
+        np.ndarray con la irradiancia total sobre el plano [W/m2] (orientaciones x time steps).
+        """
+        return self.beam + self.diffuse + self.ground
+
+    def irr_data(self, k, t_amb):
+        """
+        Función para obtener la irradiancia de una orientación con el formato de PVProduction.irr_data.
+
+        Args:
+            k (int): Posición de la orientación.
+            t_amb (float or array_like): Temperatura ambiente [ºC] de cada time step.
+
+        Returns:
+            pd.DataFrame: Gb(i), Gd(i), Gr(i) y T2m.
+        """
+        return pd.DataFrame({'Gb(i)': self.beam[k], 'Gd(i)': self.diffuse[k], 'Gr(i)': self.ground[k],
+                             'T2m': t_amb}, index=self.index)
+
+
+def get_irradiance_orientations(lat, lon, start_date, end_date, tilts, surface_azimuths, freq='1H',
+                                model='ineichen', albedo=0.25, cache=True):
+    """
+    Función para calcular la irradiancia de cielo despejado sobre varias orientaciones calculando la
+    posición solar y el cielo despejado una sola vez.
+
+    Args:
+        lat (float): Latitud.
+        lon (float): Longitud.
+        start_date, end_date (str or pd.Timestamp): Periodo.
+        tilts (array_like): Inclinación de cada orientación [º].
+        surface_azimuths (array_like): Azimut de cada orientación [º].
+        freq (str): Time step.
+        model (str): Modelo de cielo despejado de pvlib.
+        albedo (float): Albedo del suelo.
+        cache (bool): Si es False no se lee ni se escribe la caché.
+
+    Returns:
+        OrientationIrradiance: Irradiancia de todas las orientaciones (ver OrientationIrradiance.poa).
+    """
+    sky = clearsky_solar_position(lat, lon, start_date, end_date, freq=freq, model=model, cache=cache)
+    return OrientationIrradiance(sky, tilts, surface_azimuths, albedo=albedo)
@@ -1,12 +1,105 @@
-import pandas as pd
+import hashlib
+import json
 import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pv_sizing.utils.cache import default_cache_dir
+
+
+DATA_DIR = Path(__file__).parent / 'example_data'
+
+# Datos de ejemplo disponibles como atributos del módulo (from pv_sizing.utils.load_example import example_load).
+DATASETS = {'example_irr': 'example_irr.csv', 'example_load': 'example_load.csv'}
+
+_datasets = {}
+
+
+def _content_hash(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(2 ** 20), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def _cache_dir():
+    """
+    Directorio de la caché binaria: junto a los CSV si se puede escribir en él y, si no (p. ej. la librería
+    instalada en site-packages), en default_cache_dir().
+    """
+    directory = DATA_DIR / '.cache'
+    try:
+        directory.mkdir(exist_ok=True)
+        if os.access(directory, os.W_OK):
+            return directory
+    except OSError:
+        pass
+    return default_cache_dir() / 'example_data'
+
+
+def _save(array, path):
+    # Se escribe en un fichero temporal y se renombra para no dejar ficheros a medias.
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as f:
+        np.save(f, array, allow_pickle=False)
+    os.replace(f.name, path)
+
+
+def load_dataset(name, mmap=True):
+    """
+    Función para cargar unos datos de ejemplo.
+
+    La primera vez se lee el CSV y se guarda en formato binario (.npy) con el hash SHA-1 del CSV en el nombre,
+    de modo que si el CSV cambia se vuelve a generar. Las siguientes cargas leen los .npy, memory-mapped si
+    mmap es True.
+
+    El DataFrame devuelto siempre se puede modificar. Con mmap el memory-map es copy-on-write: las páginas sólo
+    se copian en memoria al escribir en ellas y los cambios nunca llegan al fichero.
+
+    Args:
+        name (str): Nombre de los datos (ver DATASETS).
+        mmap (bool): Si es True los valores se leen como memory-map copy-on-write (sin copia al leer).
+
+    Returns:
+        pd.DataFrame: Datos de ejemplo con DatetimeIndex (columna time del CSV).
+    """
+    if name not in DATASETS:
+        raise ValueError(f'name must be one of {list(DATASETS)}, found {name}.')
+    csv = DATA_DIR / DATASETS[name]
+
+    digest = _content_hash(csv)[:16]
+    directory = _cache_dir()
+    paths = {part: directory / f'{name}-{digest}.{part}' for part in ('values.npy', 'index.npy', 'columns.json')}
 
-this_dir, this_filename = os.path.split(__file__)
-DATA_PATH = os.path.join(this_dir, "example_data", "example_irr.csv")
-example_irr = pd.read_csv(DATA_PATH, index_col='time')
+    try:
+        columns = json.loads(paths['columns.json'].read_text())
+        values = np.load(paths['values.npy'], mmap_mode='c' if mmap else None, allow_pickle=False)
+        index = np.load(paths['index.npy'], allow_pickle=False)
+    except (OSError, ValueError):
+        df = pd.read_csv(csv, index_col='time', parse_dates=True)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            for path in directory.glob(f'{name}-*'):
+                path.unlink(missing_ok=True)
+            _save(df.to_numpy(dtype=float), paths['values.npy'])
+            _save(df.index.values.astype('datetime64[ns]').view(np.int64), paths['index.npy'])
+            # El fichero de columnas se escribe el último: marca que la caché está completa.
+            paths['columns.json'].write_text(json.dumps(list(df.columns)))
+        except OSError:
+            pass
+        return df
 
-this_dir, this_filename = os.path.split(__file__)
-DATA_PATH = os.path.join(this_dir, "example_data", "example_load.csv")
-example_load = pd.read_csv(DATA_PATH, index_col='time')
+    return pd.DataFrame(values, index=pd.DatetimeIndex(index.view('datetime64[ns]'), name='time'),
+                        columns=columns, copy=False)
 
 
+def __getattr__(name):
+    # Los datos de ejemplo se cargan la primera vez que se usan, no al importar el módulo.
+    if name in DATASETS:
+        if name not in _datasets:
+            _datasets[name] = load_dataset(name)
+        return _datasets[name]
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
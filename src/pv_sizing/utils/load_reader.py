@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+
+LABELS = ('start', 'end')
+
+
+def _edistribucion_chunk(chunk, date_col, hour_col, energy_col, tz, label):
+    """
+    Construye los timestamps de un bloque del CSV a partir de la fecha y la hora entera.
+    """
+    # Las fechas se repiten 23-25 veces, así que sólo se interpretan los valores distintos. Las filas que no
+    # son datos (p. ej. la fila final de totales con fecha 0) se descartan.
+    days = pd.to_datetime(chunk[date_col], format='%d/%m/%Y', cache=True, errors='coerce')
+    hours = pd.to_numeric(chunk[hour_col], errors='coerce')
+    valid = (days.notna() & hours.notna()).to_numpy()
+
+    midnight = pd.DatetimeIndex(days[valid]).tz_localize(tz)
+    # La hora h es el intervalo (h - 1, h] contado en horas reales desde medianoche, por lo que los días de
+    # 23 y 25 horas del cambio de hora quedan bien sin tratarlos aparte.
+    hours = hours[valid].to_numpy(dtype=np.int64) - (1 if label == 'start' else 0)
+    index = midnight + pd.to_timedelta(hours, unit='h')
+
+    energy = chunk[energy_col][valid]
+    if energy.dtype == object:
+        energy = pd.to_numeric(energy.str.replace(',', '.', regex=False))
+    return pd.Series(energy.to_numpy(dtype=float), index=index)
+
+
+def read_edistribucion(path, tz='Europe/Madrid', label='start', date_col='Fecha', hour_col='Hora', energy_col=None,
+                       sep=';', decimal=',', chunksize=500000):
+    """
+    Función para leer la curva de carga horaria descargada de e-distribución (https://www.edistribucion.com/).
+
+    El fichero tiene una fila por hora con la fecha (dd/mm/aaaa), la hora del día (1 a 24, 23 el día del
+    cambio de hora de marzo y 25 el de octubre) y la energía consumida. Los timestamps se calculan sumando
+    la hora a la medianoche local de cada fecha, sin construir cadenas de texto. El fichero se lee por
+    bloques de chunksize filas.
+
+    Args:
+        path (str or file-like): Fichero CSV.
+        tz (str): Zona horaria de las fechas del fichero.
+        label (str): 'start' etiqueta cada hora con su inicio (la hora 1 es la 00:00), como espera
+            PVProduction al alinear la carga con la irradiancia (ver utils.timeseries.align_load_irradiance).
+            'end' la etiqueta con su final (la hora 1 es la 01:00, como en los datos de ejemplo).
+        date_col (str): Columna con la fecha.
+        hour_col (str): Columna con la hora.
+        energy_col (str): Columna con la energía [kWh]. Por defecto la primera columna cuyo nombre contiene 'kWh'.
+        sep (str): Separador de columnas.
+        decimal (str): Separador decimal.
+        chunksize (int): Número de filas por bloque.
+
+    Returns:
+        pd.DataFrame: Columna AE_kWh con DatetimeIndex con zona horaria tz, el formato que espera PVProduction.
+    """
+    if label not in LABELS:
+        raise ValueError(f'label must be one of {LABELS}, found {label}.')
+
+    reader = pd.read_csv(path, sep=sep, decimal=decimal, chunksize=chunksize, dtype={date_col: str, hour_col: str})
+    parts = []
+    for chunk in reader:
+        if energy_col is None:
+            energy_col = next((col for col in chunk.columns if 'kWh' in col), None)
+            if energy_col is None:
+                raise ValueError(f'No energy column found in {list(chunk.columns)}, use energy_col.')
+        parts.append(_edistribucion_chunk(chunk, date_col, hour_col, energy_col, tz, label))
+
+    load = pd.concat(parts).sort_index()
+    load = load[~load.index.duplicated(keep='first')]
+    return load.rename_axis('time').to_frame('AE_kWh')
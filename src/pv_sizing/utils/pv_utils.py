@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 
+from pv_sizing.utils.constants import PR_CC, PR_DISP, PR_AC, INVERTER_ETA
+from pv_sizing.utils.timeseries import steps_per_hour
+
 def cell_temp(df_prod, irr_data, tnoct):
     """_summary_
 
@@ -15,7 +19,7 @@ def cell_temp(df_prod, irr_data, tnoct):
     df_prod['T_cell'] = irr_data['T2m'] + irr_data['Irr'] * (tnoct - 20) / 800
     return df_prod
 
-def idae_pv_prod(df_prod, df_irr, panel_power, num_panels):
+def idae_pv_prod(df_prod, df_irr, panel_power, num_panels, compact=False, step_hours=1):
 
     """_summary_
 
@@ -24,17 +28,23 @@ def idae_pv_prod(df_prod, df_irr, panel_power, num_panels):
         df_irr (_type_): _description_
         panel_power (_type_): _description_
         num_panels (_type_): _description_
+        compact (bool): Si es True sólo se guarda la columna kWh.
+        step_hours (float): Duración del time step en horas.
 
     Returns:
         _type_: _description_
     """
     # PRODUCCION
-    df_prod['Wh'] = df_prod['PR'] * df_irr['Irr'] * panel_power * num_panels / 1000 # E = GR [kW/m2] * PR * P [W] * num_panels / 1 kW/m2 /// Como son intervalos de 1 hora obtenemos Wh 
+    if compact:
+        df_prod['kWh'] = df_prod['PR'] * df_irr['Irr'] * (panel_power * num_panels * step_hours / 1e6)
+        return df_prod
+
+    df_prod['Wh'] = df_prod['PR'] * df_irr['Irr'] * panel_power * num_panels * step_hours / 1000 # E = GR [kW/m2] * PR * P [W] * num_panels / 1 kW/m2 * Δt [h] = Wh
     df_prod['kWh'] = df_prod.Wh / 1e3
     df_prod['MWh'] = df_prod.Wh / 1e6
     return df_prod
 
-def performance_ratio(df_prod_hourly, gamma, t_cell_hourly, mean_fresnel_eff):
+def performance_ratio(df_prod_hourly, gamma, t_cell_hourly, mean_fresnel_eff, compact=False):
     """_summary_
 
     Args:
@@ -42,29 +52,89 @@ def performance_ratio(df_prod_hourly, gamma, t_cell_hourly, mean_fresnel_eff):
         gamma (float): _description_
         t_cell_hourly (numpy.array or pd.Series or pd.DataFrame): _description_
         mean_fresnel_eff (float): _description_
+        compact (bool): Si es True los factores constantes se agrupan en un escalar y sólo se guarda la columna PR.
 
     Returns:
         pd.DataFrame: _description_
     """
     
     # PERFORMANCE RATIO
+    if compact:
+        df_prod_hourly['PR'] = (1 + gamma * (t_cell_hourly - 25) / 100) * pr_constant(mean_fresnel_eff)
+        return df_prod_hourly
+
     df_prod_hourly['PRtemp'] = (1 + gamma * (t_cell_hourly - 25) / 100)
 
     # OBTENIDO A PARTIR DE LA FUNCIÓN PARA LA EFICIENCIA EUROPEA
     df_prod_hourly['PRfres'] = mean_fresnel_eff
     # CAIDA DE TENSIÓN DE 0,8% PARA CC
-    df_prod_hourly['PRCC'] = 0.992
-    df_prod_hourly['PRdisp'] = 1
-    df_prod_hourly['PRCC/CA'] = european_efficiency_inverter(eta5=60, eta10=80, eta20=89, eta30=91, eta50=92,
-                                                            eta100=93) / 100
+    df_prod_hourly['PRCC'] = PR_CC
+    df_prod_hourly['PRdisp'] = PR_DISP
+    df_prod_hourly['PRCC/CA'] = european_efficiency_inverter(**INVERTER_ETA) / 100
     # CAIDA DEL 1,5% PARTE AC
-    df_prod_hourly['PRAC'] = 0.985
+    df_prod_hourly['PRAC'] = PR_AC
     df_prod_hourly['PR'] = df_prod_hourly['PRtemp'] * df_prod_hourly['PRfres'] * df_prod_hourly['PRdisp'] * \
                             df_prod_hourly['PRCC'] * df_prod_hourly['PRCC/CA'] * df_prod_hourly['PRAC']
     
     return df_prod_hourly
 
 
+def pr_constant(mean_fresnel_eff):
+    """
+    Producto de los factores constantes del Performance Ratio (todos salvo PRtemp).
+
+    Args:
+        mean_fresnel_eff (float): Eficiencia fresnel media.
+
+    Returns:
+        float: Factor constante del Performance Ratio.
+    """
+    return float(mean_fresnel_eff * PR_CC * PR_DISP * european_efficiency_inverter(**INVERTER_ETA) / 100 * PR_AC)
+
+
+def pv_prod_matrix(irr, t_amb, tnoct, gamma, panel_power, num_panels, mean_fresnel_eff, step_hours=1):
+    """
+    Producción [kWh] de varias configuraciones en una única pasada vectorizada.
+
+    Los parámetros de configuración se difunden (broadcast) entre sí. La temperatura de
+    célula y el Performance Ratio sólo se calculan una vez por cada par (tnoct, gamma)
+    distinto; el resto de configuraciones únicamente escalan por panel_power * num_panels.
+
+    Args:
+        irr (array_like): Irradiancia total sobre el plano inclinado [W/m2] por time step. Si es una matriz
+            (orientaciones x time steps) cada fila es una configuración y se difunde con el resto de parámetros.
+        t_amb (array_like): Temperatura ambiente [ºC] por time step.
+        tnoct (float or array_like): "Nominal operating cell temperature" de cada configuración.
+        gamma (float or array_like): Coeficiente de pérdidas de cada configuración.
+        panel_power (float or array_like): Potencia pico del panel de cada configuración.
+        num_panels (int or array_like): Número de paneles de cada configuración.
+        mean_fresnel_eff (float): Eficiencia fresnel media.
+        step_hours (float): Duración del time step en horas.
+
+    Returns:
+        np.ndarray: Matriz (configuraciones x time steps) con la producción en kWh.
+    """
+    irr = np.asarray(irr, dtype=float)
+    t_amb = np.asarray(t_amb, dtype=float)
+    tnoct, gamma, panel_power, num_panels = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (tnoct, gamma, panel_power, num_panels)))
+
+    if irr.ndim == 2:
+        tnoct, gamma, panel_power, num_panels = (np.broadcast_to(x, len(irr))[:, None]
+                                                 for x in (tnoct, gamma, panel_power, num_panels))
+        t_cell = t_amb + irr * (tnoct - 20) / 800
+        pr = (1 + gamma * (t_cell - 25) / 100) * pr_constant(mean_fresnel_eff)
+        return pr * irr * (panel_power * num_panels * step_hours / 1e6)
+
+    # Sólo cambia la forma del perfil si cambian tnoct o gamma.
+    thermal, inverse = np.unique(np.stack([tnoct, gamma], axis=1), axis=0, return_inverse=True)
+    t_cell = t_amb + irr * (thermal[:, :1] - 20) / 800
+    pr = (1 + thermal[:, 1:] * (t_cell - 25) / 100) * pr_constant(mean_fresnel_eff)
+    base = pr * irr * (step_hours / 1e6)  # kWh por W pico instalado
+
+    return base[inverse.ravel()] * (panel_power * num_panels)[:, None]
+
+
 def european_efficiency_inverter(eta5, eta10, eta20, eta30, eta50, eta100):
     """
     Función para el cáculo de la Eficiencia Europea de un inversor.
@@ -88,6 +158,152 @@ def init_inv(num_panel, price_panel, additional_cost, installation_cost_perc, pr
     inversion_inicial = num_panel*price_panel + price_inverter + additional_cost
     return inversion_inicial + inversion_inicial*installation_cost_perc
 
+# Día del año (base 0) en el que empieza cada mes.
+_MONTH_OFFSET = np.array([0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334])
+_MONTH_OFFSET_LEAP = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+
+LEAP_DAY_POLICIES = ('drop', 'fold', 'keep')
+
+
+def hour_of_year_codes(index, leap_day='drop', step='1h'):
+    """
+    Función para asignar a cada timestamp su hora (o time step) del año como código entero.
+
+    Args:
+        index (pd.DatetimeIndex): Índice temporal.
+        leap_day (str): Tratamiento del 29 de febrero. 'drop' lo descarta (código -1), 'fold' lo suma
+            al 28 de febrero y 'keep' usa un año de 366 días.
+        step (pd.Timedelta or str): Time step del año tipo. Debe dividir exactamente una hora.
+
+    Returns:
+        tuple: Códigos (np.ndarray de enteros) y número total de time steps del año tipo (8760 u 8784 si es horario).
+    """
+    if leap_day not in LEAP_DAY_POLICIES:
+        raise ValueError(f"leap_day must be one of {LEAP_DAY_POLICIES}, found {leap_day}.")
+
+    per_hour = steps_per_hour(step)
+    per_day = 24 * per_hour
+
+    month = index.month.values - 1
+    day = index.day.values - 1
+    step_of_day = index.hour.values * per_hour + index.minute.values // (60 // per_hour)
+
+    if leap_day == 'keep':
+        return (_MONTH_OFFSET_LEAP[month] + day) * per_day + step_of_day, 366 * per_day
+
+    is_leap_day = (month == 1) & (day == 28)
+    day_of_year = _MONTH_OFFSET[month] + day
+    codes = day_of_year * per_day + step_of_day
+    if leap_day == 'fold':
+        codes = np.where(is_leap_day, codes - per_day, codes)
+    else:
+        codes = np.where(is_leap_day, -1, codes)
+    return codes, 365 * per_day
+
+
+# Número máximo de columnas y de valores que typical_year procesa a la vez.
+_TYPICAL_YEAR_BLOCK = 256
+_TYPICAL_YEAR_VALUES = 2 ** 22
+
+
+def _typical_year_block(codes, values, n_codes):
+    """
+    Media de cada código de hora del año para un bloque de columnas, con un único bincount.
+    """
+    n_cols = values.shape[1]
+
+    # Cada columna ocupa su propio bloque de n_codes posiciones en un único bincount.
+    flat_codes = (codes[:, None] + n_codes * np.arange(n_cols)).ravel()
+    valid = ~np.isnan(values)
+    if valid.all():
+        sums = np.bincount(flat_codes, weights=values.ravel(), minlength=n_codes * n_cols)
+        counts = np.tile(np.bincount(codes, minlength=n_codes), n_cols)
+    else:
+        sums = np.bincount(flat_codes, weights=np.where(valid, values, 0).ravel(), minlength=n_codes * n_cols)
+        counts = np.bincount(flat_codes, weights=valid.ravel(), minlength=n_codes * n_cols)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (sums / counts).reshape(n_cols, n_codes).T
+
+
+def typical_year(df, leap_day='drop', step='1h'):
+    """
+    Función para calcular el año tipo (media de cada hora del año) de todas las columnas en una única pasada.
+
+    Sustituye a groupby([month, day, hour]).mean() seguido de oneyear_todatetimeindex.
+
+    Args:
+        df (pd.DataFrame or pd.Series or list): Serie temporal con DatetimeIndex y columnas numéricas, o una lista
+            de ellas con el mismo índice, que se promedian juntas sin concatenarlas.
+        leap_day (str): Tratamiento del 29 de febrero ('drop', 'fold' o 'keep'), ver hour_of_year_codes.
+        step (pd.Timedelta or str): Time step del año tipo. Debe dividir exactamente una hora.
+
+    Returns:
+        pd.DataFrame: Año tipo indexado en 2019 (o 2020 si leap_day='keep'). Las horas sin datos quedan a NaN,
+        salvo el 29 de febrero con leap_day='keep', que toma los valores del 28 de febrero.
+    """
+    frames = [df] if isinstance(df, (pd.DataFrame, pd.Series)) else list(df)
+    frames = [frame if isinstance(frame, pd.DataFrame) else frame.to_frame() for frame in frames]
+
+    codes, n_codes = hour_of_year_codes(frames[0].index, leap_day, step)
+    keep = codes >= 0
+    codes = codes[keep]
+
+    # Las tablas anchas (p. ej. una columna por cliente) y las series largas se procesan por bloques de
+    # columnas para limitar la memoria de los arrays intermedios.
+    block_size = max(1, min(_TYPICAL_YEAR_BLOCK, _TYPICAL_YEAR_VALUES // max(len(codes), 1)))
+    mean = np.empty((n_codes, sum(len(frame.columns) for frame in frames)))
+    offset = 0
+    for frame in frames:
+        for start in range(0, len(frame.columns), block_size):
+            values = frame.iloc[:, start:start + block_size].to_numpy(dtype=float)
+            block = slice(offset + start, offset + start + values.shape[1])
+            mean[:, block] = _typical_year_block(codes, values[keep] if not keep.all() else values, n_codes)
+        offset += len(frame.columns)
+
+    if leap_day == 'keep':
+        # Las series sin ningún año bisiesto toman el 29 de febrero del 28 de febrero.
+        per_day = n_codes // 366
+        feb28, feb29 = slice(58 * per_day, 59 * per_day), slice(59 * per_day, 60 * per_day)
+        mean[feb29] = np.where(np.isnan(mean[feb29]), mean[feb28], mean[feb29])
+
+    columns = frames[0].columns.append([frame.columns for frame in frames[1:]])
+    start = '2020-01-01' if leap_day == 'keep' else '2019-01-01'
+    return pd.DataFrame(mean, columns=columns, index=pd.date_range(start, periods=n_codes, freq=pd.Timedelta(step)))
+
+
+def year_matrix(series, leap_day='drop', step='1h'):
+    """
+    Función para reordenar una serie temporal de varios años en una matriz años x time steps del año.
+
+    Los time steps sin datos (años incompletos) toman el valor del año tipo.
+
+    Args:
+        series (pd.Series): Serie temporal con DatetimeIndex.
+        leap_day (str): Tratamiento del 29 de febrero ('drop', 'fold' o 'keep'), ver hour_of_year_codes.
+        step (pd.Timedelta or str): Time step del año tipo. Debe dividir exactamente una hora.
+
+    Returns:
+        pd.DataFrame: Una fila por año natural y una columna por time step del año tipo.
+    """
+    codes, n_codes = hour_of_year_codes(series.index, leap_day, step)
+    values = series.to_numpy(dtype=float)
+    years, year_idx = np.unique(series.index.year.values, return_inverse=True)
+
+    keep = (codes >= 0) & ~np.isnan(values)
+    flat = year_idx.ravel()[keep] * n_codes + codes[keep]
+    sums = np.bincount(flat, weights=values[keep], minlength=len(years) * n_codes)
+    counts = np.bincount(flat, minlength=len(years) * n_codes)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        matrix = (sums / counts).reshape(len(years), n_codes)
+
+    mean = typical_year(series, leap_day, step)
+    matrix = np.where(np.isnan(matrix), mean.iloc[:, 0].to_numpy(), matrix)
+
+    return pd.DataFrame(matrix, index=pd.Index(years, name='year'), columns=mean.index)
+
+
 def oneyear_todatetimeindex(df):
     if not isinstance(df, pd.DataFrame):
         df = df.to_frame()
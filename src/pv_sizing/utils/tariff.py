@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from pv_sizing.utils.pv_utils import hour_of_year_codes, typical_year
+
+
+def _td20_schedule():
+    """
+    Periodos horarios de la tarifa 2.0TD (península). P1 punta, P2 llano y P3 valle.
+    """
+    weekday = np.full(24, 2)
+    weekday[:8] = 3
+    weekday[10:14] = weekday[18:22] = 1
+    weekend = np.full(24, 3)
+    return np.vstack([np.tile(weekday, (5, 1)), np.tile(weekend, (2, 1))])
+
+
+# Periodo de cada hora (columnas) para cada día de la semana (filas, lunes = 0).
+TD20_SCHEDULE = _td20_schedule()
+
+
+class TimeOfUseTariff:
+
+    def __init__(self, prices, schedule=TD20_SCHEDULE, holidays=None, holiday_period=None):
+        """
+        Tarifa por periodos horarios, por ejemplo la 2.0TD española.
+
+        Args:
+            prices (dict or array_like): Precio de cada periodo, {'P1': 0.30, 'P2': 0.20, 'P3': 0.15} o
+                [0.30, 0.20, 0.15] para los periodos 1, 2 y 3.
+            schedule (array_like): Matriz 7 x 24 con el número de periodo (empezando en 1) de cada hora para
+                cada día de la semana (lunes = 0). Por defecto la 2.0TD.
+            holidays (array_like): Fechas festivas, que se facturan enteras en holiday_period. Se comparan por mes
+                y día, por lo que valen para cualquier año, también para el año tipo de referencia (2019, o 2020
+                con leap_day='keep') sobre el que se hace el balance.
+            holiday_period (int): Periodo de los festivos. Por defecto el último periodo (valle).
+        """
+        if isinstance(prices, dict):
+            prices = [prices[f'P{period}'] for period in range(1, len(prices) + 1)]
+
+        self.prices = np.asarray(prices, dtype=float)
+        self.schedule = np.asarray(schedule, dtype=int)
+        self.holidays = pd.DatetimeIndex([] if holidays is None else holidays).normalize()
+        self._holiday_days = np.unique(self.holidays.month.values * 100 + self.holidays.day.values)
+        self.holiday_period = len(self.prices) if holiday_period is None else holiday_period
+
+        if self.schedule.shape != (7, 24):
+            raise ValueError(f'Schedule must have shape (7, 24), found {self.schedule.shape}.')
+        if self.schedule.min() < 1 or self.schedule.max() > len(self.prices):
+            raise ValueError(f'Schedule uses periods not found in the {len(self.prices)} prices provided.')
+
+    def periods(self, index):
+        """
+        Función para obtener el periodo de cada timestamp.
+
+        Args:
+            index (pd.DatetimeIndex): Índice temporal.
+
+        Returns:
+            np.ndarray: Número de periodo (empezando en 1) de cada timestamp.
+        """
+        periods = self.schedule[index.dayofweek.values, index.hour.values]
+        if len(self.holidays):
+            is_holiday = np.isin(index.month.values * 100 + index.day.values, self._holiday_days)
+            periods = np.where(is_holiday, self.holiday_period, periods)
+        return periods
+
+    def profile(self, index):
+        """
+        Función para obtener el precio de cada timestamp.
+
+        Args:
+            index (pd.DatetimeIndex): Índice temporal.
+
+        Returns:
+            np.ndarray: Precio de cada timestamp.
+        """
+        return self.prices[self.periods(index) - 1]
+
+
+def price_profile(price, index):
+    """
+    Función para obtener el precio de la energía en cada timestamp de index mediante búsquedas por índice.
+
+    Args:
+        price: Precio en alguno de estos formatos:
+            - float: precio fijo.
+            - TimeOfUseTariff: tarifa por periodos.
+            - 24 valores (array_like, pd.Series o pd.DataFrame): precio de cada hora del día. Si tienen
+              DatetimeIndex se asocia cada valor a la hora de su timestamp; si no, a su posición.
+            - pd.Series o pd.DataFrame con DatetimeIndex de uno o más años: precio de cada hora del año.
+              Si hay varios años se promedian.
+            - 8760 u 8784 valores sin fechas: precio de cada hora del año por posición.
+        index (pd.DatetimeIndex): Índice temporal en el que se quiere el precio.
+
+    Returns:
+        np.ndarray: Precio en cada timestamp de index.
+    """
+    if isinstance(price, TimeOfUseTariff):
+        return price.profile(index)
+
+    if np.ndim(price) == 0:
+        return np.full(len(index), float(price))
+
+    if isinstance(price, pd.DataFrame):
+        price = price.iloc[:, 0]
+
+    if isinstance(price, pd.Series) and not isinstance(price.index, pd.DatetimeIndex):
+        try:
+            price = price.set_axis(pd.to_datetime(price.index))
+        except (TypeError, ValueError):
+            price = price.to_numpy()
+
+    if len(price) == 24:
+        by_hour = np.empty(24)
+        if isinstance(price, pd.Series):
+            by_hour[price.index.hour] = price.values
+        else:
+            by_hour[:] = price
+        return by_hour[index.hour.values]
+
+    if isinstance(price, pd.Series):
+        by_hour_of_year = typical_year(price, leap_day='keep').iloc[:, 0].to_numpy()
+        if np.isnan(by_hour_of_year).any():
+            raise ValueError('Price series does not cover every hour of the year.')
+    elif len(price) in (365 * 24, 366 * 24):
+        by_hour_of_year = np.asarray(price, dtype=float)
+        if len(by_hour_of_year) == 365 * 24:
+            by_hour_of_year = np.insert(by_hour_of_year, 59 * 24, by_hour_of_year[58 * 24:59 * 24])
+    else:
+        raise ValueError(f'{type(price)} found with length {len(price)} but 24, 8760 or 8784 was expected.')
+
+    return by_hour_of_year[hour_of_year_codes(index, leap_day='keep')[0]]
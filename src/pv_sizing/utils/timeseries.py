@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+
+HOUR = pd.Timedelta('1h')
+
+
+def infer_step(index):
+    """
+    Función para obtener el time step de una serie temporal.
+
+    Args:
+        index (pd.DatetimeIndex): Índice temporal.
+
+    Returns:
+        pd.Timedelta: Mediana de la diferencia entre timestamps consecutivos.
+    """
+    if len(index) < 2:
+        raise ValueError('At least two timestamps are needed to infer the time step.')
+    return pd.Timedelta(np.median(np.diff(index.asi8)), unit='ns')
+
+
+def steps_per_hour(step):
+    """
+    Función para obtener el número de time steps por hora.
+
+    Args:
+        step (pd.Timedelta or str): Time step. Debe dividir exactamente una hora.
+
+    Returns:
+        int: Número de time steps en una hora.
+    """
+    step = pd.Timedelta(step)
+    if step <= pd.Timedelta(0) or step > HOUR or HOUR % step != pd.Timedelta(0):
+        raise ValueError(f'Time step must divide one hour, found {step}.')
+    return int(HOUR / step)
+
+
+def _wall_time(df, tz=None):
+    """
+    Pasa el índice a hora local sin zona horaria, convirtiéndolo antes a tz si tiene zona horaria.
+    """
+    if df.index.tz is None:
+        return df
+    if tz is not None:
+        df = df.tz_convert(tz)
+    return df.tz_localize(None)
+
+
+def _localize(df, tz):
+    """
+    Asigna la zona horaria tz a un índice sin zona horaria. Un timestamp que aparece dos veces en el cambio de
+    hora de octubre es la primera vez horario de verano y la segunda de invierno (si aparece una sola vez se toma
+    el de verano), y las horas que no existen en el de marzo se descartan.
+    """
+    df = df.tz_localize(tz, ambiguous=~df.index.duplicated(keep='first'), nonexistent='NaT')
+    return df[df.index.notna()]
+
+
+def resample_energy(df, step):
+    """
+    Función para llevar una serie de energía por intervalo (p. ej. kWh) a otro time step.
+
+    Al agregar se suma la energía de cada intervalo y al desagregar se reparte a partes iguales,
+    de modo que la energía total se conserva.
+
+    Args:
+        df (pd.DataFrame): Energía por intervalo.
+        step (pd.Timedelta): Time step de destino.
+
+    Returns:
+        pd.DataFrame: Energía por intervalo en el nuevo time step.
+    """
+    step = pd.Timedelta(step)
+    source_step = infer_step(df.index)
+    if source_step > step:
+        return _repeat(df.resample(source_step).sum(min_count=1), step, divide=True)
+    return df.resample(step).sum(min_count=1)
+
+
+def resample_power(df, step):
+    """
+    Función para llevar una serie de potencia o temperatura (p. ej. W/m2, ºC) a otro time step.
+
+    Al agregar se promedia cada intervalo y al desagregar se mantiene el valor dentro del intervalo.
+
+    Args:
+        df (pd.DataFrame): Valores medios por intervalo.
+        step (pd.Timedelta): Time step de destino.
+
+    Returns:
+        pd.DataFrame: Valores medios por intervalo en el nuevo time step.
+    """
+    step = pd.Timedelta(step)
+    source_step = infer_step(df.index)
+    if source_step > step:
+        return _repeat(df.resample(source_step).mean(), step, divide=False)
+    return df.resample(step).mean()
+
+
+def _repeat(df, step, divide):
+    """
+    Desagrega una serie regular repitiendo cada fila tantas veces como time steps caben en su intervalo.
+    """
+    source_step = pd.Timedelta(df.index.freq)
+    if source_step % step != pd.Timedelta(0):
+        raise ValueError(f'Time step {source_step} is not a multiple of {step}.')
+    ratio = int(source_step / step)
+
+    values = np.repeat(df.to_numpy(), ratio, axis=0)
+    if divide:
+        values = values / ratio
+    index = pd.date_range(df.index[0], periods=len(values), freq=step, name=df.index.name)
+    return pd.DataFrame(values, index=index, columns=df.columns)
+
+
+def align_load_irradiance(load, irr_data, step=None, irr_tz='UTC', load_tz=None):
+    """
+    Función para llevar la carga y la irradiancia a una misma zona horaria y time step.
+
+    Si se conoce la zona horaria de las dos series (porque la tienen o por irr_tz y load_tz) la irradiancia se
+    convierte a la de la carga. Si ninguna tiene zona horaria se usan tal cual. Después las dos pasan a hora
+    local sin zona horaria. Cada timestamp es el inicio de su intervalo y se ajusta a la rejilla del time step,
+    de modo que los datos de PVGIS a HH:10 quedan a HH:00 (la hora de HH:00 a HH+1:00). Las series no se
+    recortan a un periodo común porque el balance se hace sobre el año tipo.
+
+    Args:
+        load (pd.DataFrame): Energía consumida por intervalo [kWh].
+        irr_data (pd.DataFrame): Irradiancias [W/m2] y temperatura [ºC] medias por intervalo.
+        step (pd.Timedelta or str): Time step común. Por defecto el menor de los dos.
+        irr_tz (str): Zona horaria de irr_data si no tiene. Por defecto UTC, la de PVGIS.
+        load_tz (str): Zona horaria de load si no tiene.
+
+    Returns:
+        tuple: Carga e irradiancia en el time step común y el propio time step.
+    """
+    if load.index.tz is None and load_tz is not None:
+        load = _localize(load, load_tz)
+
+    if load.index.tz is not None:
+        if irr_data.index.tz is None:
+            if irr_tz is None:
+                raise ValueError('load has a timezone but irr_data has not, set irr_tz to the timezone of irr_data.')
+            irr_data = _localize(irr_data, irr_tz)
+        tz = load.index.tz
+    elif irr_data.index.tz is not None:
+        raise ValueError('irr_data has a timezone but load has not, set load_tz to the timezone of load.')
+    else:
+        tz = None
+    load, irr_data = _wall_time(load), _wall_time(irr_data, tz)
+
+    step = pd.Timedelta(step) if step is not None else min(infer_step(load.index), infer_step(irr_data.index))
+    steps_per_hour(step)
+
+    return resample_energy(load, step), resample_power(irr_data, step), step
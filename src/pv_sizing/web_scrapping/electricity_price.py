@@ -1,11 +1,3 @@
-from selenium import webdriver
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-
 import datetime
 import numpy as np
 import pandas as pd
@@ -19,6 +11,9 @@ class ElectricityPrice():
         """Clase para la extracción de los precios proporcionado por Red Eléctrica de España
         por tramos horarios.
         """
+        # Selenium y webdriver_manager se importan al crear el scraper, no al importar el módulo.
+        from selenium import webdriver
+        from webdriver_manager.chrome import ChromeDriverManager
 
         self.co = webdriver.ChromeOptions()
         self.co.add_argument("--headless")
@@ -34,6 +29,8 @@ class ElectricityPrice():
             pd.DataFrame: Archivo con precios de electricidad por tramos horarios.
         """
         
+        from selenium.webdriver.common.by import By
+
         url  = 'https://tarifaluzhora.es/'
         self.driver.get(url)
 
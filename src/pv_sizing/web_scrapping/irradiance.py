@@ -1,10 +1,3 @@
-from selenium import webdriver
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
 import time
 import os
 
@@ -27,6 +20,10 @@ class PVGIS():
         self.azimuth = azimuth
         self.elevation = elevation
 
+        # Selenium y webdriver_manager se importan al crear el scraper, no al importar el módulo.
+        from selenium import webdriver
+        from webdriver_manager.chrome import ChromeDriverManager
+
         self.prefs = {'download.default_directory' : absolute_path}
         self.co = webdriver.ChromeOptions()
         self.co.add_experimental_option('prefs', self.prefs)
@@ -35,6 +32,9 @@ class PVGIS():
     def interact_with_page(self):
         """Función para interactuar con la página web de PVGIS
         """
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.common.by import By
 
         #Vamos a la página para los tramos horarios.
         url  = f'https://re.jrc.ec.europa.eu/pvg_tools/en/#HR'
@@ -0,0 +1,219 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+
+REE_URL = 'https://apidatos.ree.es/es/datos/mercados/precios-mercados-tiempo-real'
+
+
+class REEPriceSource:
+
+    def __init__(self, base_url=REE_URL, indicator='PVPC', timeout=60, session=None):
+        """
+        Fuente de precios horarios de la API de Red Eléctrica de España (apidatos.ree.es).
+
+        Args:
+            base_url (str): URL del endpoint. Permite usar un servidor local para pruebas.
+            indicator (str): Serie de la respuesta que se usa, por defecto el PVPC.
+            timeout (float): Tiempo máximo de cada petición [s].
+            session (requests.Session): Sesión HTTP compartida. Por defecto se crea una.
+        """
+        self.base_url = base_url
+        self.indicator = indicator
+        self.timeout = timeout
+        self.session = requests.Session() if session is None else session
+
+    def __call__(self, start, end):
+        """
+        Función para descargar los precios horarios entre dos días (ambos incluidos).
+
+        Args:
+            start, end (pd.Timestamp): Primer y último día.
+
+        Returns:
+            pd.Series: Precio [€/kWh] con DatetimeIndex con zona horaria.
+        """
+        params = {'start_date': f'{start:%Y-%m-%d}T00:00', 'end_date': f'{end:%Y-%m-%d}T23:59', 'time_trunc': 'hour'}
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+
+        series = response.json()['included']
+        series = next((s for s in series if s.get('type') == self.indicator), series[0])
+        values = pd.DataFrame.from_records(series['attributes']['values'])
+
+        index = pd.DatetimeIndex(pd.to_datetime(values['datetime'], utc=True))
+        return pd.Series(values['value'].values / 1000, index=index, name='price')
+
+
+class PriceStore:
+
+    def __init__(self, path, tz='Europe/Madrid'):
+        """
+        Almacén local (SQLite) de precios horarios de la electricidad.
+
+        Los precios se guardan en UTC y sólo se añaden, nunca se modifican. Se lleva un registro de los días
+        ya descargados, de modo que las actualizaciones sólo piden a la fuente los días que faltan.
+
+        Args:
+            path (str or Path): Fichero SQLite. ':memory:' para un almacén temporal.
+            tz (str): Zona horaria en la que se definen los días y se devuelven las consultas.
+        """
+        self.tz = tz
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS prices '
+                                    '(time INTEGER PRIMARY KEY, price REAL NOT NULL) WITHOUT ROWID')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS days (day TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    def days(self):
+        """
+        Returns:
+            pd.DatetimeIndex: Días ya descargados.
+        """
+        rows = self.connection.execute('SELECT day FROM days ORDER BY day').fetchall()
+        return pd.DatetimeIndex([row[0] for row in rows])
+
+    def missing_days(self, start, end):
+        """
+        Función para obtener los días de un periodo que aún no están en el almacén.
+
+        Args:
+            start, end (str or pd.Timestamp): Primer y último día.
+
+        Returns:
+            pd.DatetimeIndex: Días que faltan.
+        """
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq='D')
+        return days.difference(self.days())
+
+    def append(self, prices, days=None):
+        """
+        Función para añadir precios horarios. Los timestamps que ya estén guardados se ignoran.
+
+        Sólo se marcan como descargados los días de los que están guardadas todas sus horas (23, 24 o 25 según el
+        cambio de hora), de modo que los días incompletos (p. ej. precios aún no publicados) se vuelven a pedir en
+        la siguiente actualización.
+
+        Args:
+            prices (pd.Series): Precio [€/kWh] con DatetimeIndex. Si no tiene zona horaria se asume la del almacén.
+            days (array_like): Días que se marcan como descargados si están completos. Por defecto los días de prices.
+
+        Returns:
+            int: Número de días marcados como descargados.
+        """
+        index = prices.index if prices.index.tz is not None else prices.index.tz_localize(self.tz, ambiguous='infer')
+        seconds = index.tz_convert('UTC').asi8 // 10 ** 9
+        if days is None:
+            days = index.tz_convert(self.tz).tz_localize(None).normalize().unique()
+        days = pd.DatetimeIndex(days).normalize()
+
+        with self.connection:
+            self.connection.executemany('INSERT OR IGNORE INTO prices VALUES (?, ?)',
+                                        zip(seconds.tolist(), prices.values.astype(float).tolist()))
+            complete = days[self._complete(days)]
+            self.connection.executemany('INSERT OR IGNORE INTO days VALUES (?)',
+                                        ((f'{day:%Y-%m-%d}',) for day in complete))
+        return len(complete)
+
+    def _complete(self, days):
+        """
+        Comprueba qué días tienen guardadas todas sus horas.
+        """
+        if not len(days):
+            return np.zeros(0, dtype=bool)
+        start = days.tz_localize(self.tz, ambiguous=True, nonexistent='shift_forward')
+        end = (days + pd.Timedelta(days=1)).tz_localize(self.tz, ambiguous=True, nonexistent='shift_forward')
+
+        rows = self.connection.execute('SELECT time FROM prices WHERE time >= ? AND time < ?',
+                                       (start.min().value // 10 ** 9, end.max().value // 10 ** 9)).fetchall()
+        stored = np.array([row[0] for row in rows], dtype=np.int64)
+        stored.sort()
+        counts = (np.searchsorted(stored, end.asi8 // 10 ** 9) - np.searchsorted(stored, start.asi8 // 10 ** 9))
+        return counts >= (end - start) // pd.Timedelta(hours=1)
+
+    def update(self, source, start=None, end=None, chunk_days=31, max_workers=1):
+        """
+        Función para descargar de la fuente sólo los días que faltan.
+
+        Los días que faltan se agrupan en tramos consecutivos de como mucho chunk_days días y cada tramo es
+        una sola petición. Con max_workers > 1 los tramos se descargan en paralelo (carga histórica masiva).
+
+        Args:
+            source (callable): Función (start, end) -> pd.Series con los precios horarios de esos días, por
+                ejemplo REEPriceSource().
+            start (str or pd.Timestamp): Primer día. Por defecto el día siguiente al último guardado, u hoy si el
+                almacén está vacío.
+            end (str or pd.Timestamp): Último día. Por defecto hoy.
+            chunk_days (int): Número máximo de días por petición.
+            max_workers (int): Número de peticiones simultáneas.
+
+        Returns:
+            int: Número de días añadidos completos (ver append).
+        """
+        today = pd.Timestamp.now(tz=self.tz).tz_localize(None).normalize()
+        end = today if end is None else pd.Timestamp(end)
+        if start is None:
+            stored = self.days()
+            start = stored[-1] + pd.Timedelta(days=1) if len(stored) else today
+
+        missing = self.missing_days(start, end)
+        if not len(missing):
+            return 0
+
+        # Tramos de días consecutivos, partidos cada chunk_days días.
+        bounds = [0, *(np.flatnonzero(np.diff(missing.asi8) != pd.Timedelta(days=1).value) + 1), len(missing)]
+        chunks = [missing[i:min(i + chunk_days, b)] for a, b in zip(bounds[:-1], bounds[1:])
+                  for i in range(a, b, chunk_days)]
+
+        def fetch(chunk):
+            return source(chunk[0], chunk[-1]), chunk
+
+        added = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for prices, chunk in executor.map(fetch, chunks):
+                added += self.append(prices, days=chunk)
+
+        return added
+
+    def backfill(self, source, start, end=None, chunk_days=31, max_workers=4):
+        """
+        Función para la carga histórica masiva de un periodo (ver update).
+        """
+        return self.update(source, start=start, end=end, chunk_days=chunk_days, max_workers=max_workers)
+
+    def query(self, start, end):
+        """
+        Función para obtener los precios horarios de un periodo.
+
+        Args:
+            start, end (str or pd.Timestamp): Primer y último día (ambos incluidos), en la zona horaria del almacén.
+
+        Returns:
+            pd.Series: Precio [€/kWh] con DatetimeIndex en hora local sin zona horaria, el formato que acepta
+            PVProduction.savings_from_pv (ver utils.tariff.price_profile). En el cambio de hora de octubre
+            la hora repetida aparece dos veces, y la hora que no existe en el de marzo se rellena interpolando
+            entre la anterior y la siguiente para que la serie cubra todas las horas del año.
+        """
+        start = pd.Timestamp(start).normalize().tz_localize(self.tz)
+        end = (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).tz_localize(self.tz)
+
+        rows = self.connection.execute('SELECT time, price FROM prices WHERE time >= ? AND time < ? ORDER BY time',
+                                       (start.value // 10 ** 9, end.value // 10 ** 9)).fetchall()
+        values = np.array(rows, dtype=float).reshape(-1, 2)
+
+        index = pd.to_datetime(values[:, 0].astype(np.int64), unit='s', utc=True).tz_convert(self.tz).tz_localize(None)
+        prices = pd.Series(values[:, 1], index=index.rename('time'), name='price')
+
+        # Horas locales que no existen por el cambio de hora de marzo (p. ej. las 02:00 del último domingo).
+        hours = pd.date_range(start.tz_localize(None), end.tz_localize(None), freq='h', inclusive='left')
+        gaps = hours[hours.tz_localize(self.tz, ambiguous=True, nonexistent='NaT').isna()]
+        if len(gaps) and len(prices):
+            prices = pd.concat([prices, pd.Series(np.nan, index=gaps.rename('time'), name='price')])
+            prices = prices.sort_index(kind='stable').interpolate().bfill()
+        return prices
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,165 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pv_sizing.utils.cache import Cache
+
+
+PVGIS_URL = 'https://re.jrc.ec.europa.eu/api/v5_2/seriescalc'
+
+# Formato de los timestamps de PVGIS, p. ej. 20050101:0010.
+PVGIS_TIME_FORMAT = '%Y%m%d:%H%M'
+
+# Caché de las series horarias descargadas de PVGIS (ver utils.cache.Cache).
+pvgis_cache = Cache('pvgis')
+
+# Versión del formato de las series guardadas en pvgis_cache. Cambiarla invalida las entradas anteriores.
+_CACHE_VERSION = 2
+
+
+def _to_frame(df):
+    """
+    Pasa la columna time de PVGIS a DatetimeIndex. Los timestamps de PVGIS están en UTC.
+    """
+    df.index = pd.to_datetime(df.pop('time'), format=PVGIS_TIME_FORMAT, utc=True)
+    return df
+
+
+def parse_pvgis_csv(text):
+    """
+    Función para leer la serie horaria de PVGIS en formato CSV.
+
+    El fichero tiene un bloque de cabecera (ubicación, base de datos, orientación), la tabla horaria y un
+    bloque final con la descripción de las columnas. Sólo se pasa a pandas la tabla.
+
+    Args:
+        text (str): Contenido del CSV, tal y como lo devuelve la API o la descarga de la web.
+
+    Returns:
+        pd.DataFrame: Gb(i), Gd(i), Gr(i), H_sun, T2m, WS10m e Int con DatetimeIndex en UTC. Los datos de la
+        cabecera quedan en df.attrs['meta'].
+    """
+    # splitlines reconoce tanto \n como \r\n, así que la línea en blanco tras la tabla se detecta en ambos casos.
+    lines = text.splitlines()
+    start = next((i for i, line in enumerate(lines) if line.startswith('time,')), None)
+    if start is None:
+        raise ValueError('PVGIS hourly table not found, the header line must start with "time,".')
+    end = next((i for i in range(start + 1, len(lines)) if not lines[i].strip()), len(lines))
+
+    meta = {}
+    for line in lines[:start]:
+        key, sep, value = line.partition(':')
+        if sep and value.strip():
+            meta[key.strip()] = value.strip()
+
+    df = _to_frame(pd.read_csv(io.StringIO('\n'.join(lines[start:end])), dtype={'time': str}))
+    df.attrs['meta'] = meta
+    return df
+
+
+def parse_pvgis_json(data):
+    """
+    Función para leer la serie horaria de PVGIS en formato JSON.
+
+    Args:
+        data (dict): Respuesta JSON de la API (outputformat=json).
+
+    Returns:
+        pd.DataFrame: Mismas columnas que parse_pvgis_csv. Los bloques inputs y meta quedan en df.attrs['meta'].
+    """
+    df = _to_frame(pd.DataFrame.from_records(data['outputs']['hourly']))
+    df.attrs['meta'] = {'inputs': data.get('inputs', {}), 'meta': data.get('meta', {})}
+    return df
+
+
+class PVGISClient:
+
+    def __init__(self, base_url=PVGIS_URL, max_workers=4, timeout=60, retries=3, cache=True):
+        """
+        Cliente HTTP de la serie horaria de PVGIS (seriescalc), sin navegador.
+
+        Todas las peticiones comparten una sesión con un pool de conexiones del tamaño de max_workers, y
+        las descargas de varios emplazamientos se hacen en paralelo.
+
+        Args:
+            base_url (str): URL del endpoint. Permite usar un servidor local para pruebas.
+            max_workers (int): Número de descargas simultáneas y de conexiones del pool.
+            timeout (float): Tiempo máximo de cada petición [s].
+            retries (int): Reintentos ante errores de conexión o respuestas 429/5xx.
+            cache (bool): Si es True las series descargadas se guardan en pvgis_cache.
+        """
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache = cache
+
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def hourly(self, lat, lon, tilt=0, azimuth=0, start_year=None, end_year=None, outputformat='csv', **params):
+        """
+        Función para descargar la irradiancia horaria de un emplazamiento y orientación.
+
+        Args:
+            lat (float): Latitud.
+            lon (float): Longitud.
+            tilt (float): Inclinación de los paneles de 0º a 90º.
+            azimuth (float): Azimut de -180º a 180º con el convenio de PVGIS (0º sur, 90º oeste, -90º este).
+            start_year, end_year (int): Primer y último año. Por defecto todos los disponibles.
+            outputformat (str): 'csv' o 'json'.
+            **params: Otros parámetros de la API, p. ej. raddatabase.
+
+        Returns:
+            pd.DataFrame: Irradiancia horaria con el formato que espera PVProduction (ver parse_pvgis_csv).
+        """
+        query = {'lat': lat, 'lon': lon, 'angle': tilt, 'aspect': azimuth, 'components': 1,
+                 'outputformat': outputformat, **params}
+        if start_year is not None:
+            query['startyear'] = start_year
+        if end_year is not None:
+            query['endyear'] = end_year
+
+        key = Cache.key(self.base_url, sorted(query.items()), _CACHE_VERSION)
+        if self.cache:
+            cached = pvgis_cache.get(key)
+            if cached is not None:
+                return cached.copy()
+
+        response = self.session.get(self.base_url, params=query, timeout=self.timeout)
+        response.raise_for_status()
+        df = parse_pvgis_json(response.json()) if outputformat == 'json' else parse_pvgis_csv(response.text)
+
+        if self.cache:
+            pvgis_cache.set(key, df)
+        return df
+
+    def hourly_many(self, sites, **kwargs):
+        """
+        Función para descargar en paralelo la irradiancia horaria de varios emplazamientos.
+
+        Args:
+            sites (iterable): Diccionarios con los argumentos de hourly de cada emplazamiento,
+                p. ej. {'lat': 40.4, 'lon': -3.7, 'tilt': 30, 'azimuth': 0}.
+            **kwargs: Argumentos comunes a todos los emplazamientos.
+
+        Returns:
+            list: pd.DataFrame de cada emplazamiento, en el mismo orden que sites.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda site: self.hourly(**{**kwargs, **site}), sites))
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
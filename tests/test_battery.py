@@ -0,0 +1,35 @@
+from functools import partial
+
+import numpy as np
+import pytest
+
+from pv_sizing.utils import dispatch
+from pv_sizing.utils.dispatch import simulate_battery, simulate_battery_batch
+
+
+@pytest.mark.parametrize('compiled', [True, False])
+def test_batch_matches_one_simulation_per_candidate(compiled, monkeypatch):
+    if compiled:
+        pytest.importorskip('numba')
+    else:
+        monkeypatch.setattr(dispatch, 'njit', None)
+
+    rng = np.random.default_rng(0)
+    hours = np.arange(24 * 60) % 24
+    net = 0.4 - 2 * np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None) * rng.uniform(0.2, 1, len(hours))
+    buy, sell = np.where(hours < 8, 0.1, 0.3), np.full(len(hours), 0.06)
+    capacities = np.repeat([0.0, 2, 5, 10], 3)
+    powers = np.tile([0.5, 2, np.inf], 4)
+
+    # Bloques pequeños para cubrir el último bloque incompleto de la versión sin numba.
+    monkeypatch.setattr(dispatch, '_soc_batch_numpy', partial(dispatch._soc_batch_numpy, block=100))
+    batch = simulate_battery_batch(net, capacities, powers, round_trip_eff=0.85, dod=0.8, step_hours=0.5,
+                                   buy_price=buy, sell_price=sell)
+
+    for k, (capacity, power) in enumerate(zip(capacities, powers)):
+        one = simulate_battery(net, capacity, power=power, round_trip_eff=0.85, dod=0.8, step_hours=0.5)
+        assert np.isclose(batch['from_grid'][k], one['from_grid'].sum())
+        assert np.isclose(batch['into_grid'][k], one['into_grid'].sum())
+        assert np.isclose(batch['cost'][k], buy @ one['from_grid'])
+        assert np.isclose(batch['revenue'][k], sell @ one['into_grid'])
+
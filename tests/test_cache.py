@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pv_sizing.utils.cache import Cache, nbytes
+
+
+def test_concurrent_access_with_eviction(tmp_path):
+    # Una caché pequeña obliga a borrar ficheros mientras otros hilos los leen.
+    cache = Cache('test', maxsize=2, max_bytes=20000, directory=tmp_path)
+
+    def work(i):
+        key = Cache.key(i % 16)
+        cache.set(key, np.full(1000, i % 16))
+        value = cache.get(key)
+        return value is None or value[0] == i % 16
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(work, range(2000)))
+
+
+def test_missing_file_is_a_miss(tmp_path):
+    cache = Cache('test', maxsize=0, directory=tmp_path)
+    key = Cache.key('a')
+    cache.set(key, 1)
+    cache._path(key).unlink()
+    assert cache.get(key) is None
+
+
+def test_memory_is_bounded_by_bytes(tmp_path):
+    cache = Cache('test', maxsize=32, max_bytes=0, max_memory_bytes=3 * 8000 + 1000, directory=tmp_path)
+    frame = pd.DataFrame({'a': np.zeros(1000)})
+    keys = [Cache.key(i) for i in range(5)]
+    for key in keys[:4]:
+        cache.set(key, np.zeros(1000))
+
+    assert cache.get(keys[0]) is None and cache.get(keys[3]) is not None
+    assert cache.memory_bytes == 3 * 8000
+
+    # Un valor mayor que todo el presupuesto desplaza a los demás pero se conserva.
+    cache.set(keys[4], np.zeros(10000))
+    assert list(cache._memory) == [keys[4]] and cache.memory_bytes == 80000
+    assert nbytes(frame) == frame.memory_usage(deep=True).sum()
+    assert nbytes((frame, np.zeros(10))) > nbytes(frame) + 80
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from pv_sizing.utils import dispatch
+from pv_sizing.utils.dispatch import simulate_battery
+
+
+def test_efficiency_and_dod_bounds():
+    # dod 0.8: entre 1 y 5 kWh. Eficiencia 0,81: 0,9 al cargar y 0,9 al descargar.
+    result = simulate_battery([-10, 10], 5, round_trip_eff=0.81, dod=0.8)
+    assert np.allclose(result['soc'], [5, 1])
+    assert np.allclose(result['charge'], [4 / 0.9, 0])
+    assert np.allclose(result['discharge'], [0, 4 * 0.9])
+    assert np.allclose(result['into_grid'], [10 - 4 / 0.9, 0])
+    assert np.allclose(result['from_grid'], [0, 10 - 4 * 0.9])
+
+
+def test_power_bound():
+    result = simulate_battery([-10, 10], 5, power=2, round_trip_eff=0.81, dod=0.8, step_hours=0.5)
+    assert np.allclose(result['charge'], [1, 0])
+    assert np.allclose(result['soc'], [1.9, 1])
+    assert np.allclose(result['discharge'], [0, 0.81])
+
+
+def test_numba_and_python_kernels_agree(monkeypatch):
+    pytest.importorskip('numba')
+    rng = np.random.default_rng(0)
+    net = rng.normal(0, 2, 5000)
+    kwargs = dict(power=3, round_trip_eff=0.9, dod=0.85, step_hours=1)
+
+    compiled = simulate_battery(net, 8, **kwargs)
+    monkeypatch.setattr(dispatch, 'njit', None)
+    python = simulate_battery(net, 8, **kwargs)
+
+    for name in compiled:
+        assert np.allclose(compiled[name], python[name], rtol=0, atol=1e-12)
+    soc = compiled['soc']
+    assert soc.min() >= 8 * 0.15 - 1e-12 and soc.max() <= 8 + 1e-12
+    assert compiled['charge'].max() <= 3 and compiled['discharge'].max() <= 3
+    assert np.allclose(compiled['from_grid'] - compiled['into_grid'],
+                       net - compiled['discharge'] + compiled['charge'])
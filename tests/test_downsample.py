@@ -0,0 +1,49 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_sizing.utils.downsample import downsample, lttb_indices, minmax_indices
+
+
+def reference_lttb(y, n_out):
+    """
+    Implementación de referencia de LTTB (Steinarsson, 2013), punto a punto.
+    """
+    n = len(y)
+    every = (n - 2) / (n_out - 2)
+    indices = [0]
+    a = 0
+    for i in range(n_out - 2):
+        avg_start, avg_end = math.floor((i + 1) * every) + 1, min(math.floor((i + 2) * every) + 1, n)
+        avg_x = sum(range(avg_start, avg_end)) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+
+        best, best_area = None, -1.0
+        for j in range(math.floor(i * every) + 1, math.floor((i + 1) * every) + 1):
+            area = abs((a - avg_x) * (y[j] - y[a]) - (a - j) * (avg_y - y[a])) * 0.5
+            if area > best_area:
+                best, best_area = j, area
+        indices.append(best)
+        a = best
+    indices.append(n - 1)
+    return indices
+
+
+@pytest.mark.parametrize('n, n_out', [(1000, 100), (8760, 2000), (8760, 3), (10007, 977)])
+def test_lttb_matches_reference(n, n_out):
+    y = np.cumsum(np.random.default_rng(n).normal(size=n))
+    assert list(lttb_indices(y, n_out)) == reference_lttb(y.tolist(), n_out)
+
+
+def test_minmax_keeps_peaks_and_visible_range():
+    y = np.zeros(10000)
+    y[1234], y[8765] = 5.0, -5.0
+    indices = minmax_indices(y, 100)
+    assert len(indices) <= 100 and {1234, 8765} <= set(indices)
+
+    series = pd.Series(np.arange(8760.), index=pd.date_range('2019-01-01', periods=8760, freq='h'))
+    week = downsample(series, n_out=2000, x_range=('2019-03-01', '2019-03-08'))
+    assert week.index[0] <= pd.Timestamp('2019-03-01') and week.index[-1] >= pd.Timestamp('2019-03-08')
+    assert len(week) == 7 * 24 + 3
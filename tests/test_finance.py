@@ -0,0 +1,17 @@
+import numpy as np
+import numpy_financial as npf
+
+from pv_sizing.utils.finance import irr
+
+
+def test_irr_matches_numpy_financial():
+    rng = np.random.default_rng(0)
+    cf = np.concatenate([np.full((50, 1), -5000.), rng.uniform(200, 900, (50, 24))], axis=1)
+    np.testing.assert_allclose(irr(cf), [npf.irr(row) for row in cf], atol=1e-8)
+
+
+def test_irr_edge_cases():
+    assert np.isnan(irr(np.zeros(10)))
+    assert np.isnan(irr(np.zeros((3, 10)))).all()
+    assert abs(irr([-100., 100.])) < 1e-12
+    assert np.isnan(irr([100., 100.]))
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from pv_sizing.utils.irradiance import OrientationIrradiance, clearsky_solar_position
+
+
+def test_orientations_match_pvlib_transposition():
+    irradiance = pytest.importorskip('pvlib.irradiance')
+    sky = clearsky_solar_position(40.4, -3.7, '2021-01-01', '2021-12-31 23:00', freq='1h', cache=False)
+    tilts, azimuths = [0, 15, 30, 45, 90], [90, 135, 180, 225, 270]
+
+    orientations = OrientationIrradiance(sky, tilts, azimuths)
+
+    for k, (tilt, azimuth) in enumerate(zip(tilts, azimuths)):
+        expected = irradiance.get_total_irradiance(surface_tilt=tilt, surface_azimuth=azimuth, dni=sky['dni'],
+                                                   ghi=sky['ghi'], dhi=sky['dhi'],
+                                                   solar_zenith=sky['apparent_zenith'], solar_azimuth=sky['azimuth'])
+        assert np.allclose(orientations.poa[k], expected['poa_global'], rtol=0, atol=1e-10)
+        assert np.allclose(orientations.beam[k], expected['poa_direct'], rtol=0, atol=1e-10)
+        assert np.allclose(orientations.diffuse[k], expected['poa_sky_diffuse'], rtol=0, atol=1e-10)
+        assert np.allclose(orientations.ground[k], expected['poa_ground_diffuse'], rtol=0, atol=1e-10)
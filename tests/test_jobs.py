@@ -0,0 +1,38 @@
+import time
+
+from pv_sizing.app_layout.jobs import JobManager
+from pv_sizing.utils.cache import Cache
+
+
+def square(job, x):
+    return x * x
+
+
+def fail(job, x):
+    raise ValueError(x)
+
+
+def wait_all(jobs, keys):
+    while any((jobs.status(key) or {}).get('state') in ('queued', 'running') for key in keys):
+        time.sleep(0.01)
+
+
+def test_finished_jobs_are_forgotten_with_their_result():
+    jobs = JobManager(cache=Cache('test_jobs', maxsize=2, max_bytes=0), max_finished=1)
+    try:
+        keys = [jobs.submit(square, i) for i in range(2)]
+        wait_all(jobs, keys)
+        assert [jobs.result(key) for key in keys] == [0, 1]
+
+        # El tercer resultado saca al primero de la caché.
+        keys.append(jobs.submit(square, 2))
+        wait_all(jobs, keys)
+        assert jobs.result(keys[2]) == 4
+        failed = [jobs.submit(fail, i) for i in range(3)]
+        wait_all(jobs, failed)
+        jobs.submit(square, 3)
+        assert len(jobs._jobs) <= 2 + 1 + 1
+        assert jobs.status(keys[0]) is None and jobs.result(keys[0]) is None
+        assert jobs.status(failed[0]) is None and jobs.status(failed[-1])['state'] == 'failed'
+    finally:
+        jobs.shutdown()
@@ -0,0 +1,16 @@
+from pv_sizing.utils import load_example
+
+
+def test_example_load_is_writable_from_csv_and_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(load_example, '_cache_dir', lambda: tmp_path)
+
+    first = load_example.load_dataset('example_load')
+    cached = load_example.load_dataset('example_load')
+    assert any(tmp_path.glob('example_load-*.values.npy'))
+    assert cached.equals(first)
+
+    for df in (first, cached):
+        df.iloc[0, 0] = 1
+        assert df.iloc[0, 0] == 1
+    # Los cambios no llegan al fichero.
+    assert load_example.load_dataset('example_load').iloc[0, 0] != 1
@@ -0,0 +1,36 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from pv_sizing.utils.load_reader import read_edistribucion
+from pv_sizing.utils.timeseries import align_load_irradiance
+
+
+def edistribucion_csv(day, hours, energy):
+    rows = ''.join(f'{day};{hour};{value:.3f}'.replace('.', ',') + '\n' for hour, value in zip(hours, energy))
+    return io.StringIO('CUPS;Fecha;Hora;AE_kWh\n' + rows.replace(f'{day};', f'ES00;{day};'))
+
+
+def test_default_label_aligns_load_hour_with_pvgis_hour():
+    # Consumo sólo entre las 12:00 y las 13:00 hora local (Hora 13), un día de verano (UTC+2).
+    energy = np.where(np.arange(1, 25) == 13, 1.0, 0.0)
+    load = read_edistribucion(edistribucion_csv('01/07/2021', range(1, 25), energy))
+    assert load.AE_kWh.idxmax() == pd.Timestamp('2021-07-01 12:00', tz='Europe/Madrid')
+
+    # Irradiancia de PVGIS (UTC, a HH:10) sólo en la hora de 10:00 a 11:00 UTC, la misma hora real.
+    index = pd.date_range('2021-06-30 22:10', periods=24, freq='h')
+    irr = pd.DataFrame({'G': np.where(index.hour == 10, 500.0, 0.0)}, index=index)
+
+    load, irr, _ = align_load_irradiance(load, irr)
+    assert load.AE_kWh.idxmax() == irr.G.idxmax() == pd.Timestamp('2021-07-01 12:00')
+
+
+def test_dst_days_and_end_label():
+    load = read_edistribucion(edistribucion_csv('28/03/2021', range(1, 24), np.ones(23)))
+    assert len(load) == 23
+    assert load.index[2] == pd.Timestamp('2021-03-28 03:00', tz='Europe/Madrid')
+
+    load = read_edistribucion(edistribucion_csv('31/10/2021', range(1, 26), np.ones(25)), label='end')
+    assert load.index[0] == pd.Timestamp('2021-10-31 01:00', tz='Europe/Madrid')
+    assert len(load) == 25 and load.index.is_unique
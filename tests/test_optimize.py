@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from pv_sizing.dimension.optimize import optimize_pv_size
+from pv_sizing.dimension.pv import PVProduction
+from pv_sizing.utils.finance import payback_period
+from pv_sizing.utils.pv_utils import init_inv
+
+from test_pv import irradiance
+
+
+def test_candidates_match_economic_analysis():
+    irr = irradiance('h')
+    index = irr.index[irr.index.year == 2020]
+    load = pd.DataFrame({'AE_kWh': 0.2 + 0.2 * np.cos(np.arange(len(index)))}, index=index)
+    pv = PVProduction(load=load, irr_data=irr, tnoct=42, gamma=-0.36, panel_power=400, num_panel=8)
+    buy_price = [0.1] * 8 + [0.3] * 16
+
+    best, results = optimize_pv_size(pv, range(1, 15), price_panel=260, price_inverter=1300, additional_cost=500,
+                                     installation_cost_perc=0.15, buy_price=buy_price, discount_rate=0.05)
+
+    for row in results.itertuples():
+        reference = PVProduction(load=load, irr_data=irr, tnoct=42, gamma=-0.36, panel_power=400,
+                                 num_panel=row.num_panel)
+        cashflow, van, tir = reference.economic_analysis(init_inv(row.num_panel, 260, 500, 0.15, 1300),
+                                                         buy_price=buy_price, discount_rate=0.05)
+        assert np.isclose(row.npv, van)
+        assert np.isclose(row.irr, tir)
+        assert np.isclose(row.payback, payback_period(cashflow['Cashflow'].values), equal_nan=True)
+    assert best.npv == results.npv.max()
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_sizing.dimension.portfolio import portfolio_analysis
+from pv_sizing.dimension.pv import PVProduction
+
+from test_pv import irradiance
+
+
+@pytest.mark.parametrize('balance_mode', ['typical', 'per_year'])
+def test_customer_row_matches_pv_production(balance_mode):
+    irr = irradiance('h')
+    index = irr.index[irr.index.year == 2020]
+    steps = np.arange(len(index))
+    loads = pd.DataFrame({'a': 0.3 + 0.2 * np.cos(steps / 5), 'b': 0.6 + 0.1 * np.sin(steps / 11),
+                          'c': np.full(len(index), 0.1)}, index=index)
+    num_panels, init_inversion = np.array([4, 8, 12]), np.array([3000, 5000, 7000])
+    args = dict(irr_data=irr, tnoct=42, gamma=-0.36, panel_power=400, balance_mode=balance_mode)
+    buy_price = [0.1] * 8 + [0.3] * 16
+
+    pv = PVProduction(load=loads[['a']], num_panel=8, **args)
+    results = portfolio_analysis(pv, loads, num_panels=num_panels, buy_price=buy_price, sell_price=0.05,
+                                 init_inversion=init_inversion, discount_rate=0.03)
+
+    for customer, num_panel, inversion in zip(loads.columns, num_panels, init_inversion):
+        reference = PVProduction(load=loads[[customer]], num_panel=num_panel, **args)
+        row = results.loc[customer]
+        savings = reference.savings_from_pv(buy_price=buy_price, sell_price=0.05)
+        assert np.allclose(row[['cost_without_pv', 'cost_with_pv', 'compensation', 'savings']], savings)
+
+        _, van, tir = reference.economic_analysis(inversion, buy_price=buy_price, sell_price=0.05,
+                                                  discount_rate=0.03)
+        assert np.isclose(row.npv, van)
+        assert np.isclose(row.irr, tir)
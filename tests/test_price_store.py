@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from pv_sizing.dimension.pv import PVProduction
+from pv_sizing.web_scrapping.price_store import PriceStore
+
+
+TZ = 'Europe/Madrid'
+
+
+def hourly_source(start, end, published=None):
+    """
+    Fuente de precios falsa: todas las horas locales de los días pedidos, hasta published (excluido) si se indica.
+    """
+    hours = pd.date_range(pd.Timestamp(start).tz_localize(TZ),
+                          (pd.Timestamp(end) + pd.Timedelta(days=1)).tz_localize(TZ), freq='h', inclusive='left')
+    if published is not None:
+        hours = hours[hours < pd.Timestamp(published).tz_localize(TZ)]
+    return pd.Series(0.1 + 0.01 * hours.hour.values, index=hours.tz_convert('UTC'), name='price')
+
+
+def synthetic_pv():
+    irr_index = pd.date_range('2019-01-01 00:10', '2020-12-31 23:10', freq='h', name='time')
+    sun = np.clip(np.sin((irr_index.hour.values - 6) / 12 * np.pi), 0, None)
+    irr = pd.DataFrame({'Gb(i)': 600 * sun, 'Gd(i)': 100 * sun, 'Gr(i)': 5 * sun, 'H_sun': 30 * sun,
+                        'T2m': 15 + 5 * sun, 'WS10m': 2.0, 'Int': 0.0}, index=irr_index)
+    load_index = pd.date_range('2021-01-01 01:00', '2021-12-31 23:00', freq='h', name='time')
+    load = pd.DataFrame({'AE_kWh': 0.3 + 0.1 * np.cos(load_index.hour.values / 24 * 2 * np.pi)}, index=load_index)
+    return PVProduction(load=load, irr_data=irr, tnoct=42, gamma=-0.36, panel_power=400, num_panel=8)
+
+
+def test_query_covers_every_hour_and_feeds_savings():
+    store = PriceStore(':memory:')
+    store.backfill(hourly_source, start='2021-01-01', end='2021-12-31', chunk_days=40)
+
+    buy_price = store.query('2021-01-01', '2021-12-31')
+    # 8760 horas locales más la hora repetida de octubre; la de marzo se rellena.
+    assert len(buy_price) == 8761
+    assert pd.Timestamp('2021-03-28 02:00') in buy_price.index
+    assert buy_price.notna().all()
+
+    savings = synthetic_pv().savings_from_pv(buy_price=buy_price, sell_price=0.06)
+    assert np.isfinite(savings).all()
+
+
+def test_days_with_missing_hours_are_fetched_again():
+    store = PriceStore(':memory:')
+    assert store.update(lambda start, end: hourly_source(start, end, published='2021-06-02 00:00'),
+                        start='2021-06-01', end='2021-06-03') == 1
+    assert list(store.missing_days('2021-06-01', '2021-06-03').strftime('%Y-%m-%d')) == ['2021-06-02', '2021-06-03']
+
+    assert store.update(hourly_source, start='2021-06-01', end='2021-06-03') == 2
+    assert not len(store.missing_days('2021-06-01', '2021-06-03'))
+    assert len(store.query('2021-06-01', '2021-06-03')) == 72
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_sizing.dimension.pv import PVProduction
+from pv_sizing.utils.timeseries import align_load_irradiance
+
+
+TZ = 'Europe/Madrid'
+
+
+def irradiance(freq):
+    index = pd.date_range('2019-01-01', '2020-12-31 23:45', freq=freq, name='time')
+    hours = index.hour.values + index.minute.values / 60
+    sun = np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None)
+    return pd.DataFrame({'Gb(i)': 600 * sun, 'Gd(i)': 100 * sun, 'Gr(i)': 5 * sun, 'H_sun': 30 * sun,
+                         'T2m': 15 + 5 * sun, 'WS10m': 2.0, 'Int': 0.0}, index=index)
+
+
+def test_mean_hourly_production_only_scales_energy():
+    results = []
+    for freq, step_load in (('h', 0.3), ('15min', 0.075)):
+        irr = irradiance(freq)
+        load = pd.DataFrame({'AE_kWh': step_load}, index=irr.index[irr.index.year == 2020])
+        pv = PVProduction(load=load, irr_data=irr, tnoct=42, gamma=-0.36, panel_power=400, num_panel=8)
+        results.append(pv.mean_hourly_irr_data().loc[12])
+
+    hourly, quarter = results
+    assert abs(quarter['T_cell'] - hourly['T_cell']) < 1
+    assert abs(quarter['PR'] - hourly['PR']) < 0.01
+    assert abs(quarter['kWh'] / hourly['kWh'] - 1) < 0.02
+
+
+def test_align_converts_naive_utc_irradiance_to_load_timezone():
+    irr = pd.DataFrame({'G': np.arange(48.)}, index=pd.date_range('2021-07-01 00:10', periods=48, freq='h'))
+    load = pd.DataFrame({'AE_kWh': 1.0}, index=pd.date_range('2021-07-01 01:00', periods=48, freq='h', tz=TZ))
+
+    _, irr_local, _ = align_load_irradiance(load, irr)
+    # 00:10 UTC son las 02:00 en Madrid en verano.
+    assert irr_local.index[0] == pd.Timestamp('2021-07-01 02:00')
+
+    with pytest.raises(ValueError):
+        align_load_irradiance(load, irr, irr_tz=None)
+    with pytest.raises(ValueError):
+        align_load_irradiance(load.tz_localize(None), irr.tz_localize('UTC'))
+
+
+def test_assigned_load_is_normalized_and_aligned_like_in_init():
+    irr = irradiance('h')
+    index = irr.index[irr.index.year == 2020]
+    hourly = pd.DataFrame({'kWh': 0.3}, index=index)
+    quarter = pd.DataFrame({'kWh': 0.1}, index=pd.date_range(index[0], index[-1] + pd.Timedelta('45min'), freq='15min'))
+    args = dict(irr_data=irr, tnoct=42, gamma=-0.36, panel_power=400, num_panel=8)
+
+    pv = PVProduction(load=hourly, **args)
+    pv.savings_from_pv()
+    pv.load = quarter
+
+    expected = PVProduction(load=quarter, **args)
+    assert pv.step == expected.step == pd.Timedelta('15min')
+    assert list(pv.load.columns) == ['AE_kWh']
+    assert np.allclose(pv.savings_from_pv(), expected.savings_from_pv())
+    assert list(hourly.columns) == ['kWh']
+
+    with pytest.raises(ValueError):
+        pv.balance_mode = 'bogus'
+    with pytest.raises(ValueError):
+        PVProduction(load=hourly, balance_mode='bogus', **args)
+
+
+def test_float32_compact_production_stays_in_float32_and_leaves_irradiance_untouched():
+    irr = irradiance('h')
+    load = pd.DataFrame({'AE_kWh': 0.3}, index=irr.index[irr.index.year == 2020])
+    args = dict(load=load, irr_data=irr, tnoct=42, gamma=-0.36, panel_power=400, num_panel=8)
+
+    reference = PVProduction(**args)
+    pv = PVProduction(compact=True, dtype=np.float32, **args)
+
+    assert (pv.prod_data.dtypes == np.float32).all()
+    assert list(pv.prod_data.columns) == ['T_cell', 'PR', 'kWh']
+    assert 'Irr' not in pv.irr_data.columns and 'Irr' not in irr.columns
+    assert np.allclose(pv.myprod_yearly.kWh, reference.myprod_yearly.kWh, rtol=1e-5, atol=1e-6)
+    assert np.allclose(pv.myirr_yearly.Irr, reference.myirr_yearly.Irr, rtol=1e-5)
+    assert list(reference.myprod_yearly.columns) == list(reference.prod_data.columns)
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_sizing.utils.pv_utils import hour_of_year_codes, typical_year, year_matrix
+
+
+def series(start, end, freq='h', columns=('a', 'b'), seed=0):
+    index = pd.date_range(start, end, freq=freq, name='time')
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.random((len(index), len(columns))), index=index, columns=list(columns))
+
+
+def test_matches_groupby_on_non_leap_years():
+    df = series('2017-01-01', '2019-12-31 23:00')
+    expected = df.groupby([df.index.month, df.index.day, df.index.hour]).mean()
+
+    result = typical_year(df)
+    assert len(result) == 8760
+    assert result.index[0] == pd.Timestamp('2019-01-01') and result.index[-1] == pd.Timestamp('2019-12-31 23:00')
+    assert np.allclose(result.values, expected.values)
+
+
+def test_leap_day_policies():
+    df = series('2019-01-01', '2020-12-31 23:00')
+    feb28, feb29 = df.loc['2019-02-28':'2020-02-28'], df.loc['2020-02-29']
+    feb28 = feb28[(feb28.index.month == 2) & (feb28.index.day == 28)]
+    hourly = lambda frame: frame.groupby(frame.index.hour).mean().values
+
+    drop = typical_year(df, 'drop')
+    assert len(drop) == 8760
+    assert np.allclose(drop.loc['2019-02-28'].values, hourly(feb28))
+
+    fold = typical_year(df, 'fold')
+    assert len(fold) == 8760
+    assert np.allclose(fold.loc['2019-02-28'].values, hourly(pd.concat([feb28, feb29])))
+    assert np.allclose(fold.loc['2019-03-01':].values, drop.loc['2019-03-01':].values)
+
+    keep = typical_year(df, 'keep')
+    assert len(keep) == 8784 and keep.index[0].year == 2020
+    assert np.allclose(keep.loc['2020-02-29'].values, feb29.values)
+    assert np.allclose(keep.loc['2020-03-01':].values, drop.loc['2019-03-01':].values)
+
+    # Sin ningún año bisiesto el 29 de febrero toma los valores del 28.
+    keep = typical_year(df.loc['2019'], 'keep')
+    assert np.allclose(keep.loc['2020-02-29'].values, keep.loc['2020-02-28'].values)
+
+    codes, n_codes = hour_of_year_codes(df.index, 'drop')
+    assert n_codes == 8760 and (codes == -1).sum() == 24
+    with pytest.raises(ValueError):
+        hour_of_year_codes(df.index, 'bogus')
+
+
+def test_quarter_hour_step():
+    df = series('2018-01-01', '2019-12-31 23:45', freq='15min')
+    expected = df.groupby([df.index.month, df.index.day, df.index.hour, df.index.minute]).mean()
+
+    result = typical_year(df, step='15min')
+    assert len(result) == 365 * 96
+    assert result.index[1] == pd.Timestamp('2019-01-01 00:15')
+    assert np.allclose(result.values, expected.values)
+
+
+def test_nan_values_are_skipped():
+    df = series('2018-01-01', '2019-12-31 23:00')
+    df.iloc[5, 0] = np.nan
+    df.loc['2018-06-01 12:00', 'b'] = df.loc['2019-06-01 12:00', 'b'] = np.nan
+
+    result = typical_year(df)
+    assert result.a.iloc[5] == df.a.iloc[5 + 8760]
+    assert np.isnan(result.loc['2019-06-01 12:00', 'b'])
+    assert result.b.notna().sum() == 8759
+
+    # year_matrix rellena los huecos de cada año con el año tipo.
+    matrix = year_matrix(df.a)
+    assert list(matrix.index) == [2018, 2019]
+    assert matrix.loc[2018].iloc[5] == result.a.iloc[5]
+    assert matrix.loc[2019].iloc[6] == df.a.iloc[6 + 8760]
+
+
+def test_list_of_frames_matches_concatenation():
+    index = pd.date_range('2019-01-01', '2020-12-31 23:00', freq='h')
+    rng = np.random.default_rng(3)
+    a = pd.DataFrame(rng.random((len(index), 3)), index=index, columns=['a', 'b', 'c'])
+    b = pd.DataFrame({'d': rng.random(len(index))}, index=index)
+    b.iloc[::7] = np.nan
+
+    expected = typical_year(pd.concat([a, b], axis=1), 'keep')
+    pd.testing.assert_frame_equal(typical_year([a, b], 'keep'), expected)
+    pd.testing.assert_frame_equal(typical_year([a, b['d']], 'keep'), expected)
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from pv_sizing.web_scrapping.pvgis import parse_pvgis_csv, parse_pvgis_json
+
+
+CSV = '''Latitude (decimal degrees):	40.400
+Longitude (decimal degrees):	-3.700
+Elevation (m):	667
+Radiation database:	PVGIS-SARAH2
+
+Slope: 30 deg.
+Azimuth: 0 deg.
+time,Gb(i),Gd(i),Gr(i),H_sun,T2m,WS10m,Int
+20200101:0010,0.0,0.0,0.0,0.0,3.1,1.2,0.0
+20200101:0110,0.0,0.0,0.0,0.0,2.9,1.1,0.0
+20200101:1210,512.3,88.1,4.2,27.5,10.4,2.3,0.0
+
+Gb(i): Beam (direct) irradiance on the inclined plane (plane of the array) (W/m2)
+Gd(i): Diffuse irradiance on the inclined plane (plane of the array) (W/m2)
+'''
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_parse_csv_with_any_newline(newline):
+    df = parse_pvgis_csv(CSV.replace('\n', newline))
+
+    assert len(df) == 3
+    assert list(df.columns) == ['Gb(i)', 'Gd(i)', 'Gr(i)', 'H_sun', 'T2m', 'WS10m', 'Int']
+    assert df.index[2] == pd.Timestamp('2020-01-01 12:10', tz='UTC')
+    assert df['Gb(i)'].iloc[2] == 512.3
+    assert df.attrs['meta']['Radiation database'] == 'PVGIS-SARAH2'
+
+
+def test_parse_json_is_utc():
+    data = {'outputs': {'hourly': [{'time': '20200101:1210', 'Gb(i)': 512.3, 'T2m': 10.4}]}}
+    assert parse_pvgis_json(data).index[0] == pd.Timestamp('2020-01-01 12:10', tz='UTC')
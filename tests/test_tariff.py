@@ -0,0 +1,92 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_sizing.dimension.pv import PVProduction
+from pv_sizing.utils.tariff import TimeOfUseTariff, price_profile
+
+from test_pv import irradiance
+
+
+INDEX = pd.date_range('2019-01-01', periods=8760, freq='h')
+LEAP_INDEX = pd.date_range('2020-01-01', periods=8784, freq='h')
+
+
+def test_fixed_price():
+    assert np.array_equal(price_profile(0.2, INDEX), np.full(8760, 0.2))
+
+
+def test_24_hourly_prices():
+    prices = np.arange(24) / 100
+    assert np.allclose(price_profile(list(prices), INDEX), np.tile(prices, 365))
+
+    # Con DatetimeIndex cada precio va a la hora de su timestamp, aunque no estén en orden.
+    hours = pd.date_range('2022-04-09', periods=24, freq='h')
+    shuffled = pd.DataFrame({'price': prices}, index=hours).iloc[np.r_[5:24, 0:5]]
+    assert np.allclose(price_profile(shuffled, INDEX), np.tile(prices, 365))
+
+
+def test_hourly_series_of_one_or_more_years():
+    index = pd.date_range('2021-01-01', '2022-12-31 23:00', freq='h')
+    price = pd.Series(np.where(index.year == 2021, 0.1, 0.3) + index.hour / 100, index=index)
+    assert np.allclose(price_profile(price, INDEX), 0.2 + INDEX.hour / 100)
+
+    with pytest.raises(ValueError):
+        price_profile(price[(price.index.month != 6) | (price.index.day != 1)], INDEX)
+
+
+def test_8760_and_8784_values_by_position():
+    prices = np.arange(8760.)
+    assert np.array_equal(price_profile(prices, INDEX), prices)
+    # El 29 de febrero toma los precios del 28.
+    leap = price_profile(prices, LEAP_INDEX)
+    assert np.array_equal(leap[59 * 24:60 * 24], prices[58 * 24:59 * 24])
+    assert np.array_equal(leap[60 * 24:], prices[59 * 24:])
+
+    assert np.array_equal(price_profile(np.arange(8784.), LEAP_INDEX), np.arange(8784.))
+    with pytest.raises(ValueError):
+        price_profile(np.arange(100.), INDEX)
+
+
+def test_td20_schedule_and_holidays():
+    tariff = TimeOfUseTariff({'P1': 0.30, 'P2': 0.20, 'P3': 0.15}, holidays=['2023-12-25'])
+    # Lunes 7 de enero de 2019: valle hasta las 8, llano, punta de 10 a 14 y de 18 a 22.
+    monday = price_profile(tariff, pd.date_range('2019-01-07', periods=24, freq='h'))
+    expected = [0.15] * 8 + [0.2] * 2 + [0.3] * 4 + [0.2] * 4 + [0.3] * 4 + [0.2] * 2
+    assert np.allclose(monday, expected)
+
+    assert np.allclose(price_profile(tariff, pd.date_range('2019-01-12', periods=48, freq='h')), 0.15)
+    # Festivo indicado en otro año: el 25 de diciembre de 2019 (miércoles) es todo valle.
+    assert np.allclose(price_profile(tariff, pd.date_range('2019-12-25', periods=24, freq='h')), 0.15)
+    assert price_profile(tariff, pd.DatetimeIndex(['2019-12-24 12:00'])) == 0.3
+
+    with pytest.raises(ValueError):
+        TimeOfUseTariff([0.3, 0.2])
+
+
+def test_24_prices_reproduce_deque_rotation():
+    irr = irradiance('h')
+    # Carga etiquetada por el final de cada hora, como los datos de ejemplo: empieza a la 01:00.
+    index = pd.date_range('2020-01-01 01:00', '2021-01-01 00:00', freq='h')
+    load = pd.DataFrame({'AE_kWh': 0.3 + 0.2 * np.cos(np.arange(len(index)) / 5)}, index=index)
+    pv = PVProduction(load=load, irr_data=irr, tnoct=42, gamma=-0.36, panel_power=400, num_panel=8)
+    price = pd.DataFrame({'price': 0.1 + np.arange(24) / 100},
+                         index=pd.date_range('2022-04-09', periods=24, freq='h'))
+
+    # Implementación anterior: se rotan las etiquetas del índice hasta que la primera hora coincide con la de la
+    # carga y después se repiten los valores por posición a lo largo del año tipo.
+    rotated = price.copy()
+    while rotated.index[0].hour != load.index[0].hour:
+        dq = deque(rotated.index)
+        dq.rotate(1)
+        rotated.index = dq
+    by_step = np.array(rotated.price.tolist() * (len(pv.myload_yearly) // 24))
+
+    balance = np.nan_to_num(pv.energy_balance()[0].values)
+    load_yearly = np.nan_to_num(pv.myload_yearly.AE_kWh.values)
+    expected = (by_step @ load_yearly, by_step @ balance.clip(0, None), -(by_step @ balance.clip(None, 0)))
+
+    result = pv.savings_from_pv(buy_price=price, sell_price=price)
+    assert np.allclose(result[:3], expected)